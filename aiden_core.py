@@ -9,16 +9,32 @@ import json
 import datetime
 import subprocess
 import platform
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 
 
 class AidenCore:
+    # Command categories, checked in this order. Keywords match anywhere in the command
+    # (substring semantics, like the keyword lists they replace); one compiled
+    # alternation per category instead of a Python-level scan per keyword
+    _DIAGNOSTICS_RE = re.compile("status|sistema|diagnóstico|diagnostics", re.IGNORECASE)
+    _FILE_RE = re.compile("arquivo|file|diretório|directory|pasta|folder", re.IGNORECASE)
+    _TIME_RE = re.compile("tempo|time|data|date|horário|schedule", re.IGNORECASE)
+    _INFO_RE = re.compile("informação|information|sobre|about|specs", re.IGNORECASE)
+    _PROCESS_RE = re.compile("processo|process|task|tarefa", re.IGNORECASE)
+    _PERFORMANCE_RE = re.compile("memória|memory|performance|desempenho", re.IGNORECASE)
+    _POWER_RE = re.compile("desligar|shutdown|reiniciar|restart", re.IGNORECASE)
+    _HELP_RE = re.compile("ajuda|help|comandos|commands", re.IGNORECASE)
+    
     def __init__(self, name: str = "Sir"):
         self.user_name = name
         self.status = "online"
         self.start_time = datetime.datetime.now()
         self.command_history = []
+        # True when the last reply doesn't depend on live data and can be reused as-is
+        self.last_response_static = False
         self.system_info = self._get_system_info()
         self.capabilities = {
             "system_monitoring": True,
@@ -28,6 +44,8 @@ class AidenCore:
             "task_scheduling": True,
             "diagnostics": True
         }
+        # System probes (df, free, ps) are independent subprocesses; run them side by side
+        self._probe_executor = ThreadPoolExecutor(max_workers=3)
         
     def _get_system_info(self) -> Dict[str, Any]:
         """Collect comprehensive system information"""
@@ -75,66 +93,78 @@ class AidenCore:
             "command": command
         })
         
-        command_lower = command.lower().strip()
+        self.last_response_static = False
         
         # System monitoring commands
-        if any(keyword in command_lower for keyword in ["status", "sistema", "diagnóstico", "diagnostics"]):
+        if self._DIAGNOSTICS_RE.search(command):
             return self._system_diagnostics()
         
         # File management commands
-        elif any(keyword in command_lower for keyword in ["arquivo", "file", "diretório", "directory", "pasta", "folder"]):
+        elif self._FILE_RE.search(command):
             return self._file_management(command)
         
         # Time and schedule commands
-        elif any(keyword in command_lower for keyword in ["tempo", "time", "data", "date", "horário", "schedule"]):
+        elif self._TIME_RE.search(command):
             return self._time_management()
         
         # System information commands
-        elif any(keyword in command_lower for keyword in ["informação", "information", "sobre", "about", "specs"]):
+        elif self._INFO_RE.search(command):
+            self.last_response_static = True  # system_info is gathered once at startup
             return self._system_information()
         
         # Process management commands  
-        elif any(keyword in command_lower for keyword in ["processo", "process", "task", "tarefa"]):
+        elif self._PROCESS_RE.search(command):
             return self._process_management(command)
         
         # Memory and performance commands
-        elif any(keyword in command_lower for keyword in ["memória", "memory", "performance", "desempenho"]):
+        elif self._PERFORMANCE_RE.search(command):
             return self._performance_analysis()
         
         # Shutdown/restart commands
-        elif any(keyword in command_lower for keyword in ["desligar", "shutdown", "reiniciar", "restart"]):
+        elif self._POWER_RE.search(command):
+            self.last_response_static = True
             return self._power_management(command)
         
         # Help command
-        elif any(keyword in command_lower for keyword in ["ajuda", "help", "comandos", "commands"]):
+        elif self._HELP_RE.search(command):
+            self.last_response_static = True
             return self._help_system()
         
         # Default intelligent response
         else:
             return self._general_response(command)
     
+    def _run_probe(self, args: List[str]):
+        """Start a system command on the probe pool; returns a future with its output"""
+        return self._probe_executor.submit(subprocess.check_output, args, universal_newlines=True)
+    
     def _system_diagnostics(self) -> str:
         """Comprehensive system diagnostics"""
         response = f"Running comprehensive diagnostics, {self.user_name}...\n\n"
         
+        # Start all probes at once; each result is collected in report order below
+        disk_probe = self._run_probe(["df", "-h", "/"])
+        mem_probe = self._run_probe(["free", "-h"]) if platform.system() == "Linux" else None
+        ps_probe = self._run_probe(["ps", "aux"])
+        
         # Check disk space
         try:
-            disk_usage = subprocess.check_output(["df", "-h", "/"], universal_newlines=True)
+            disk_usage = disk_probe.result()
             response += "📊 Disk Usage Analysis:\n" + disk_usage + "\n"
         except:
             response += "📊 Disk Usage: Unable to retrieve disk information\n\n"
         
         # Check memory usage
         try:
-            if platform.system() == "Linux":
-                mem_info = subprocess.check_output(["free", "-h"], universal_newlines=True)
+            if mem_probe is not None:
+                mem_info = mem_probe.result()
                 response += "🧠 Memory Status:\n" + mem_info + "\n"
         except:
             response += "🧠 Memory Status: Unable to retrieve memory information\n\n"
         
         # Check running processes count
         try:
-            process_count = len(subprocess.check_output(["ps", "aux"], universal_newlines=True).split('\n')) - 1
+            process_count = len(ps_probe.result().split('\n')) - 1
             response += f"⚙️  Active Processes: {process_count}\n\n"
         except:
             response += "⚙️  Process Information: Unavailable\n\n"
@@ -7,10 +7,11 @@ This module integrates all AIDEN capabilities with graceful fallbacks for missin
 """
 
 import os
-import sys
+import re
 import json
 import datetime
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List
 
 # Import AIDEN core
 from aiden_core import AidenCore
@@ -31,19 +32,22 @@ except ImportError:
     print("[INFO] Speech recognition not available - text-only mode")
 
 try:
-    from text_to_speech import speak_text, adapt_voice_settings
+    from text_to_speech import speak_text, adapt_voice_settings, split_for_speech, warm_up
     TEXT_TO_SPEECH_AVAILABLE = True
 except ImportError:
     TEXT_TO_SPEECH_AVAILABLE = False
     print("[INFO] Text-to-speech not available - text-only mode")
 
 try:
-    from web_scraper import search_web, get_page_summary
+    from web_scraper import search_web, google_snippets
     WEB_SCRAPING_AVAILABLE = True
 except ImportError:
     WEB_SCRAPING_AVAILABLE = False
     print("[INFO] Web scraping not available - using fallback")
 
+# Consecutive unrecognized phrases before the microphone is recalibrated
+RECALIBRATE_AFTER = 3
+
 
 class AIDEN:
     """
@@ -57,12 +61,37 @@ class AIDEN:
     - Professional, helpful interface
     """
     
+    # Command triggers, each scanned in a single case-insensitive regex pass
+    # (whole words, with the plural forms the old substring checks also caught)
+    _VOICE_RE = re.compile(r"\b(?:voz|vozes|voices?|falar|speak|volume|velocidade|grave|agudo)\b", re.I)
+    _CORE_RE = re.compile(
+        r"\b(?:status|diagnósticos?|diagnostics?|sistemas?|systems?|arquivos?|files?|diretórios?|"
+        r"director(?:y|ies)|pastas?|folders?|tempo|time|data|dates?|processos?|process(?:es)?|"
+        r"memória|memory|performance|desempenho|ajuda|help)\b", re.I)
+    # Research trigger words; also removed from the command to form the query
+    _RESEARCH_STRIP_RE = re.compile(r"\b(?:pesquisar|procurar|buscar|search|research)\b", re.I)
+    _EXIT_COMMANDS = frozenset({"sair", "exit", "quit", "goodbye", "tchau"})
+    
+    # Fallback-response categories, one word-bounded pattern each
+    _PAT_GREETING = re.compile(r"\b(?:olá|oi|hello|hi|bom dia|boa tarde|boa noite)\b", re.I)
+    _PAT_QUESTION = re.compile(r"\?\s*$|\b(?:como|what|how|why|quando|where)\b", re.I)
+    _PAT_TASK = re.compile(r"\b(?:fazer|criar|do|create|make|execute)\b", re.I)
+    _PAT_LEARNING = re.compile(r"\b(?:saber|conhecer|learn|know|ensinar|teach)\b", re.I)
+    
     def __init__(self, user_name: str = "User", gemini_api_key: Optional[str] = None):
         self.user_name = user_name
         self.aiden_core = AidenCore(user_name)
         self.session_start = datetime.datetime.now()
         self.conversation_history = []
         
+        # Speech runs on one worker thread so the next prompt (or Gemini call)
+        # doesn't wait for playback; voice listening still waits for it
+        self._speech_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aiden-tts")
+        self._speech_future = None
+        if TEXT_TO_SPEECH_AVAILABLE:
+            # Load the pyttsx3 driver and voice on the speech thread while the rest starts up
+            self._speech_executor.submit(warm_up, 'offline', user_name)
+        
         # Initialize Firebase integration
         try:
             from firebase_integration import get_firebase_manager
@@ -92,9 +121,12 @@ class AIDEN:
                 self.speech_recognizer.energy_threshold = 300
                 self.speech_recognizer.dynamic_energy_threshold = True
                 self.speech_recognizer.pause_threshold = 0.8
+                # Calibrate once at startup; the dynamic threshold follows the noise afterwards
+                self._calibrate_microphone()
                 print("[INFO] Voice recognition capabilities initialized and optimized")
             except Exception as e:
                 print(f"[WARNING] Voice recognition initialization failed: {e}")
+        self._unrecognized_streak = 0
         
         # System capabilities report
         self.capabilities = {
@@ -129,23 +161,29 @@ class AIDEN:
         
         return greeting
     
+    def _calibrate_microphone(self) -> None:
+        """Measure the ambient noise floor for the recognizer"""
+        with self.microphone as source:
+            print("🎤 Adjusting for ambient noise...")
+            self.speech_recognizer.adjust_for_ambient_noise(source, duration=1)
+    
     def listen(self) -> str:
         """
         Listen for user input via voice or text
         PRIORITIZES voice input - voice is the primary interface for AIDEN
         """
         if self.capabilities["voice_recognition"]:
+            # Don't let the microphone pick up AIDEN still speaking
+            self._wait_for_speech()
             try:
                 with self.microphone as source:
-                    # More aggressive noise adjustment for better voice detection
-                    print("🎤 Adjusting for ambient noise...")
-                    self.speech_recognizer.adjust_for_ambient_noise(source, duration=1)
                     print("🎤 Listening for your voice... (speak clearly)")
                     
                     # Longer timeout and phrase limit for natural conversation
                     audio = self.speech_recognizer.listen(source, timeout=10, phrase_time_limit=15)
                     text = self.speech_recognizer.recognize_google(audio, language='pt-BR')
                     print(f"🗣️  Recognized: {text}")
+                    self._unrecognized_streak = 0
                     return text
                     
             except sr.WaitTimeoutError:
@@ -153,6 +191,14 @@ class AIDEN:
                 return self._get_text_input()
             except sr.UnknownValueError:
                 print("❓ Could not understand speech clearly. Please try again or type your request.")
+                # Repeated misses usually mean the noise floor changed
+                self._unrecognized_streak += 1
+                if self._unrecognized_streak >= RECALIBRATE_AFTER:
+                    self._unrecognized_streak = 0
+                    try:
+                        self._calibrate_microphone()
+                    except Exception as e:
+                        print(f"[WARNING] Microphone recalibration failed: {e}")
                 return self._get_text_input()
             except sr.RequestError as e:
                 print(f"❌ Speech recognition service error: {e}")
@@ -180,27 +226,36 @@ class AIDEN:
         formatted_text = f"🤖 AIDEN: {text}"
         print(formatted_text)
         
-        # PRIORITY: Attempt text-to-speech if available
+        # PRIORITY: Attempt text-to-speech if available, in the background
         if self.capabilities["text_to_speech"]:
-            try:
-                # Use improved TTS with user-specific voice settings
-                if not speak_text(text, method='offline', user_id=self.user_name):
-                    # Fallback to online TTS if offline fails
-                    speak_text(text, method='online', user_id=self.user_name)
-                    print("🔊 Audio output: Online TTS used")
-                else:
-                    print("🔊 Audio output: Offline TTS used")
-            except Exception as e:
-                print(f"🔇 TTS Error: {e} - Audio output unavailable")
+            self._speech_future = self._speech_executor.submit(self._speak_blocking, text)
         else:
             print("🔇 Text-to-speech not available - text only mode")
     
+    def _speak_blocking(self, text: str) -> None:
+        """Run text-to-speech to completion (executed on the speech worker)"""
+        try:
+            # Long texts are spoken a few sentences at a time so audio starts sooner
+            for chunk in split_for_speech(text):
+                # Use improved TTS with user-specific voice settings
+                if not speak_text(chunk, method='offline', user_id=self.user_name):
+                    # Fallback to online TTS if offline fails
+                    speak_text(chunk, method='online', user_id=self.user_name)
+        except Exception as e:
+            print(f"🔇 TTS Error: {e} - Audio output unavailable")
+    
+    def _wait_for_speech(self) -> None:
+        """Block until everything queued for speech has been spoken"""
+        if self._speech_future is not None:
+            self._speech_future.result()
+            self._speech_future = None
+    
     def process_command(self, command: str) -> str:
         """
         Process user commands with enhanced intelligence and Firebase integration
         Combines AIDEN core capabilities with advanced AI and Firebase storage/search
         """
-        if not command or command.lower() in ['sair', 'exit', 'quit', 'goodbye', 'tchau']:
+        if not command or command.lower() in self._EXIT_COMMANDS:
             return self.shutdown()
         
         # Log conversation
@@ -221,18 +276,11 @@ class AIDEN:
                 print(f"[Firebase Search Error] {e}")
         
         # Check for voice adaptation commands
-        if any(keyword in command.lower() for keyword in ["voz", "voice", "falar", "speak", "volume", "velocidade", "grave", "agudo"]):
+        if self._VOICE_RE.search(command):
             return self._handle_voice_adaptation(command)
         
         # Check for core AIDEN commands first
-        core_keywords = [
-            "status", "diagnóstico", "diagnostics", "sistema", "system",
-            "arquivo", "file", "diretório", "directory", "pasta", "folder",
-            "tempo", "time", "data", "date", "processo", "process",
-            "memória", "memory", "performance", "desempenho", "ajuda", "help"
-        ]
-        
-        if any(keyword in command.lower() for keyword in core_keywords):
+        if self._CORE_RE.search(command):
             response = self.aiden_core.process_command(command)
             
             # Save system command results to Firebase
@@ -243,7 +291,7 @@ class AIDEN:
                     print(f"[Firebase Save Error] {e}")
         
         # Web research commands with Firebase integration
-        elif any(keyword in command.lower() for keyword in ["pesquisar", "procurar", "buscar", "search", "research"]):
+        elif self._RESEARCH_STRIP_RE.search(command):
             response = self._handle_research_with_firebase(command, previous_results)
         
         # Advanced AI conversation with Firebase storage
@@ -292,9 +340,7 @@ User query: {command}"""
     
     def _handle_research_with_firebase(self, command: str, previous_results: List[Dict]) -> str:
         """Handle web research requests with Firebase integration"""
-        query = command.lower()
-        for term in ["pesquisar", "procurar", "buscar", "search", "research"]:
-            query = query.replace(term, "").strip()
+        query = " ".join(self._RESEARCH_STRIP_RE.sub(" ", command.lower()).split())
         
         response = f"Searching for: '{query}'\n\n"
         
@@ -338,25 +384,20 @@ User query: {command}"""
     
     def _handle_research(self, command: str) -> str:
         """Handle web research requests"""
-        query = command.lower()
-        for term in ["pesquisar", "procurar", "buscar", "search", "research"]:
-            query = query.replace(term, "").strip()
+        query = " ".join(self._RESEARCH_STRIP_RE.sub(" ", command.lower()).split())
         
         response = f"Initiating web research for: '{query}', {self.user_name}.\n\n"
         
         if self.capabilities["web_research"]:
             try:
                 # Perform web search
-                search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-                soup = scrape_static_page(search_url)
+                snippets = google_snippets(query, limit=3)
                 
-                if soup:
+                if snippets is not None:
                     # Try to extract search results
-                    snippets = soup.find_all("div", class_="BNeawe s3v9rd AP7Wnd")[:3]
                     if snippets:
                         response += "🔍 Research Results:\n\n"
-                        for i, snippet in enumerate(snippets, 1):
-                            response += f"{i}. {snippet.get_text()}\n\n"
+                        response += "".join(f"{i}. {snippet}\n\n" for i, snippet in enumerate(snippets, 1))
                     else:
                         response += "Research completed, but I was unable to extract clear results from the current search format."
                 else:
@@ -371,8 +412,6 @@ User query: {command}"""
     
     def _generate_fallback_response(self, command: str, previous_results: List[Dict] = None) -> str:
         """Generate intelligent fallback responses when advanced AI is unavailable"""
-        command_lower = command.lower()
-        
         # Include previous results context if available
         context_note = ""
         if previous_results:
@@ -381,19 +420,19 @@ User query: {command}"""
                 context_note += f"• {result.get('query')}: {result.get('result')[:150]}...\n"
         
         # Greeting responses
-        if any(word in command_lower for word in ["olá", "oi", "hello", "hi", "bom dia", "boa tarde", "boa noite"]):
+        if self._PAT_GREETING.search(command):
             return f"Hello, {self.user_name}. I am AIDEN, your Advanced Interactive Digital Enhancement Network. How may I assist you today?{context_note}"
         
         # Question responses
-        elif command_lower.endswith("?") or any(word in command_lower for word in ["como", "what", "how", "why", "quando", "where"]):
+        elif self._PAT_QUESTION.search(command):
             return f"That's an interesting question, {self.user_name}. While I don't have access to my full AI capabilities at the moment, I can help with system operations, file management, and diagnostics.{context_note}"
         
         # Task requests
-        elif any(word in command_lower for word in ["fazer", "criar", "do", "create", "make", "execute"]):
+        elif self._PAT_TASK.search(command):
             return f"I understand you'd like me to perform a task, {self.user_name}. I can assist with system monitoring, file management, and diagnostic functions. Please specify what you'd like me to do.{context_note}"
         
         # Learning/knowledge requests
-        elif any(word in command_lower for word in ["saber", "conhecer", "learn", "know", "ensinar", "teach"]):
+        elif self._PAT_LEARNING.search(command):
             return f"Knowledge is important, {self.user_name}. I maintain operational knowledge about system administration and diagnostics, and I can search our conversation history for relevant information.{context_note}"
         
         # Default intelligent response
@@ -439,6 +478,7 @@ User query: {command}"""
         if self.firebase_manager:
             try:
                 self.firebase_manager.save_conversation("shutdown", shutdown_message)
+                self.firebase_manager.flush_now()
                 shutdown_message += f"• Session data saved to Firebase\n"
             except Exception as e:
                 print(f"[Firebase Save Error] {e}")
@@ -480,6 +520,9 @@ User query: {command}"""
         except Exception as e:
             print(f"\nCritical error in AIDEN main system: {e}")
             print("Emergency shutdown initiated.")
+        finally:
+            # Let the farewell finish before the process exits
+            self._speech_executor.shutdown(wait=True)
 
 
 def main():
@@ -1,8 +1,10 @@
-import google.generativeai as genai
+import importlib.util
 import os
 import datetime
 import locale
-from typing import Optional
+import threading
+import time
+from typing import Iterator, Optional
 
 # Safe import for dotenv
 try:
@@ -17,12 +19,90 @@ else:
     if os.getenv("GOOGLE_API_KEY") is None and os.getenv("GEMINI_API_KEY") is None:
         print("[Aviso] python-dotenv não instalado. Instale com 'pip install python-dotenv' para carregar .env automaticamente.")
 
+def _module_available(name: str) -> bool:
+    """Whether a module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:  # Parent package missing
+        return False
+
+# google-generativeai (and the gRPC stack under it) takes a while to import, so
+# it is only loaded when a ConversationalAI is created; sessions without an API
+# key never pay for it. Importing this module still fails fast when it's missing.
+if not _module_available("google.generativeai"):
+    raise ImportError("google-generativeai não instalado (pip install google-generativeai)")
+
+# Per-request deadline for Gemini calls (seconds). Voice callers block on it, so
+# it is kept short; for streamed replies it covers the whole stream, and flash
+# answers of normal length finish well inside it
+GEMINI_TIMEOUT = 45
+
+# While idle, touch the API this often (seconds) so the connection stays warm...
+KEEPALIVE_INTERVAL = 60
+# ...but only this long after the last real request (seconds), so an unattended
+# session stops spending quota
+KEEPALIVE_IDLE_LIMIT = 300
+
+# Routine diagnostics are only printed with DEBUG_MODE=true
+DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
+
+# Static persona, sent once as the model's system instruction instead of being
+# prepended to (and stored in the chat history with) every user message
+SYSTEM_INSTRUCTION = """Você é AIDEN (Advanced Interactive Digital Enhancement Network), um assistente de IA inteligente.
+
+Suas capacidades incluem:
+- Acesso a informações de data e hora atuais
+- Conhecimento geral e conversação natural
+- Assistência com tarefas e perguntas
+- Respostas em português brasileiro
+
+Diretrizes de resposta:
+- Seja útil, profissional e amigável
+- Responda de forma conversacional mas informativa
+- Para perguntas sobre data/hora, use as informações atuais fornecidas
+- Mantenha respostas concisas mas completas"""
+
+# Specific time/date question patterns (precise, to avoid false positives)
+_TIME_QUESTION_PATTERNS = (
+    'que horas', 'que hora', 'qual hora', 'hora atual', 'horário',
+    'que dia', 'qual data', 'data atual', 'data de hoje', 'hoje é',
+    'what time', 'current time', 'what date', 'current date', 'today is',
+    'quando é', 'que data é', 'calendário hoje'
+)
+
+# Time keywords that only count as a question on their own (or in a two-word phrase)
+_STANDALONE_TIME_WORDS = ('agora', 'hoje', 'current', 'calendar', 'calendário')
+
+def is_time_question(message: str) -> bool:
+    """Whether the message asks for the current date or time."""
+    message_lower = message.lower()
+    if any(pattern in message_lower for pattern in _TIME_QUESTION_PATTERNS):
+        return True
+    words = message_lower.split()
+    return any(
+        word == message_lower.strip() or (len(words) <= 2 and word in words)
+        for word in _STANDALONE_TIME_WORDS
+    )
+
 class ConversationalAI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, extra_instructions: Optional[str] = None):
+        """
+        Args:
+            api_key: Gemini API key
+            extra_instructions: Caller-specific guidance appended to the system instruction
+        """
+        import google.generativeai as genai
+        
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        instruction = SYSTEM_INSTRUCTION + "\n\n" + extra_instructions if extra_instructions else SYSTEM_INSTRUCTION
+        self.model = genai.GenerativeModel("gemini-1.5-flash", system_instruction=instruction)
         self.chat = self.model.start_chat(history=[])
         
+        self._last_request = time.monotonic()
+        self.last_stream_ok = False  # whether the last streamed reply came from Gemini (not a fallback)
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread = None
+        
         # Set Portuguese locale for date/time formatting
         try:
             locale.setlocale(locale.LC_TIME, 'pt_BR.UTF-8')
@@ -32,6 +112,29 @@ class ConversationalAI:
             except:
                 pass  # Fallback to system default
 
+    def start_keepalive(self, interval: float = KEEPALIVE_INTERVAL):
+        """Keep the Gemini connection warm with a cheap count_tokens call when idle."""
+        if self._keepalive_thread is None:
+            self._keepalive_thread = threading.Thread(target=self._keepalive_loop, args=(interval,), daemon=True)
+            self._keepalive_thread.start()
+    
+    def stop_keepalive(self):
+        """Stop the keep-alive thread (call on shutdown)."""
+        self._keepalive_stop.set()
+    
+    def _keepalive_loop(self, interval: float):
+        while not self._keepalive_stop.wait(interval):
+            # Pings don't count as requests, so they stop KEEPALIVE_IDLE_LIMIT after
+            # the last real one and resume once the user talks to Gemini again
+            idle = time.monotonic() - self._last_request
+            if idle < interval or idle > KEEPALIVE_IDLE_LIMIT:
+                continue
+            try:
+                self.model.count_tokens("ping")
+            except Exception as e:
+                if DEBUG_MODE:
+                    print(f"[Gemini] Keep-alive falhou: {e}")
+
     def _get_current_datetime_info(self) -> str:
         """Get comprehensive current date and time information."""
         now = datetime.datetime.now()
@@ -56,53 +159,12 @@ class ConversationalAI:
 
     def _enhance_prompt_with_context(self, message: str) -> str:
         """Enhance the user's message with current context and capabilities."""
+        # The persona lives in the system instruction; only per-turn context is added here
+        if is_time_question(message):
+            return (f"Informações atuais de data e hora:\n{self._get_current_datetime_info()}"
+                    f"\n\nPergunta do usuário: {message}")
         
-        # Check if the message is specifically asking for date/time information
-        # Using more precise patterns to avoid false positives
-        message_lower = message.lower()
-        
-        # Specific time/date question patterns
-        time_question_patterns = [
-            'que horas', 'que hora', 'qual hora', 'hora atual', 'horário',
-            'que dia', 'qual data', 'data atual', 'data de hoje', 'hoje é',
-            'what time', 'current time', 'what date', 'current date', 'today is',
-            'quando é', 'que data é', 'calendário hoje'
-        ]
-        
-        # Check for standalone time keywords (as complete words)
-        standalone_time_words = ['agora', 'hoje', 'current', 'calendar', 'calendário']
-        
-        enhanced_prompt = f"""Você é AIDEN (Advanced Interactive Digital Enhancement Network), um assistente de IA inteligente.
-        
-        Suas capacidades incluem:
-        - Acesso a informações de data e hora atuais
-        - Conhecimento geral e conversação natural
-        - Assistência com tarefas e perguntas
-        - Respostas em português brasileiro
-        
-        Diretrizes de resposta:
-        - Seja útil, profissional e amigável
-        - Responda de forma conversacional mas informativa
-        - Para perguntas sobre data/hora, use as informações atuais fornecidas
-        - Mantenha respostas concisas mas completas
-        """
-        
-        # Check if any time question pattern is present
-        has_time_pattern = any(pattern in message_lower for pattern in time_question_patterns)
-        
-        # Check if message is only a standalone time word (or very short phrase with time word)
-        is_standalone_time = any(
-            word.strip() == message_lower.strip() or 
-            (len(message_lower.split()) <= 2 and word in message_lower.split())
-            for word in standalone_time_words
-        )
-        
-        if has_time_pattern or is_standalone_time:
-            enhanced_prompt += f"\n\nInformações atuais de data e hora:\n{self._get_current_datetime_info()}"
-        
-        enhanced_prompt += f"\n\nPergunta do usuário: {message}"
-        
-        return enhanced_prompt
+        return message
 
     def send_message(self, message: str) -> str:
         """Send a message to the AI with enhanced context and error handling."""
@@ -111,7 +173,8 @@ class ConversationalAI:
             enhanced_message = self._enhance_prompt_with_context(message)
             
             # Send to Gemini
-            response = self.chat.send_message(enhanced_message)
+            self._last_request = time.monotonic()
+            response = self.chat.send_message(enhanced_message, request_options={"timeout": GEMINI_TIMEOUT})
             return response.text
             
         except Exception as e:
@@ -120,31 +183,66 @@ class ConversationalAI:
             # Provide intelligent fallback responses
             return self._generate_fallback_response(message)
     
+    def send_message_stream(self, message: str) -> Iterator[str]:
+        """Send a message and yield the reply text incrementally as Gemini generates it."""
+        produced = False
+        finished = False
+        response = None
+        self.last_stream_ok = False
+        try:
+            enhanced_message = self._enhance_prompt_with_context(message)
+            
+            self._last_request = time.monotonic()
+            response = self.chat.send_message(enhanced_message, stream=True,
+                                              request_options={"timeout": GEMINI_TIMEOUT})
+            for chunk in response:
+                text = chunk.text
+                if text:
+                    produced = True
+                    yield text
+            finished = True
+            self.last_stream_ok = produced
+                    
+        except Exception as e:
+            print(f"Erro ao enviar mensagem para o Gemini API: {e}")
+            if not produced:
+                yield self._generate_fallback_response(message)
+        finally:
+            # The chat history is unusable while a streamed reply is half-read
+            # (the consumer stopped early, or the stream failed), so drop the exchange
+            if response is not None and not finished:
+                try:
+                    self.chat.rewind()
+                except Exception as e:
+                    print(f"[Aviso] Não foi possível descartar a resposta interrompida: {e}")
+    
+    def generate_followup(self, message: str) -> Optional[str]:
+        """Answer a message in the current conversation without adding it to the history.
+
+        Used to prepare a likely next question ahead of time; call
+        adopt_exchange() if the user does ask it. Returns None on failure.
+        """
+        try:
+            contents = [*self.chat.history, {"role": "user", "parts": [self._enhance_prompt_with_context(message)]}]
+            self._last_request = time.monotonic()
+            response = self.model.generate_content(contents, request_options={"timeout": GEMINI_TIMEOUT})
+            return response.text or None
+        except Exception as e:
+            print(f"[Aviso] Pré-busca do Gemini falhou: {e}")
+            return None
+    
+    def adopt_exchange(self, message: str, reply: str):
+        """Record a question and its (prefetched) answer in the chat history."""
+        self.chat.history = [*self.chat.history,
+                             {"role": "user", "parts": [message]},
+                             {"role": "model", "parts": [reply]}]
+    
     def _generate_fallback_response(self, message: str) -> str:
         """Generate intelligent fallback responses when API fails."""
         message_lower = message.lower()
         
-        # Handle date/time queries locally using improved detection
-        time_question_patterns = [
-            'que horas', 'que hora', 'qual hora', 'hora atual', 'horário',
-            'que dia', 'qual data', 'data atual', 'data de hoje', 'hoje é',
-            'what time', 'current time', 'what date', 'current date', 'today is',
-            'quando é', 'que data é', 'calendário hoje'
-        ]
-        
-        standalone_time_words = ['agora', 'hoje', 'current', 'calendar', 'calendário']
-        
-        # Check if any time question pattern is present
-        has_time_pattern = any(pattern in message_lower for pattern in time_question_patterns)
-        
-        # Check if message is only a standalone time word (or very short phrase with time word)
-        is_standalone_time = any(
-            word.strip() == message_lower.strip() or 
-            (len(message_lower.split()) <= 2 and word in message_lower.split())
-            for word in standalone_time_words
-        )
-        
-        if has_time_pattern or is_standalone_time:
+        # Handle date/time queries locally
+        if is_time_question(message):
             return f"Informações atuais de data e hora:{self._get_current_datetime_info()}"
         
         # Handle greetings
@@ -3,11 +3,67 @@ Firebase Integration Module for AIDEN
 Handles saving and retrieving conversation data and search results from Firebase Realtime Database
 """
 
+import atexit
+import base64
 import json
 import datetime
 import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
 from typing import Dict, List, Optional, Any
 
+# Number of recently saved searches kept in memory for write-through lookups
+RECENT_SEARCHES_SIZE = 128
+
+# Fallbacks used when the config omits the project settings
+DEFAULT_PROJECT_ID = 'aiden-dd627'
+DEFAULT_DATABASE_URL = 'https://aiden-dd627-default-rtdb.firebaseio.com/'
+
+# Background write batching: at most MAX_BATCH records per multi-path update,
+# waiting up to FLUSH_INTERVAL seconds for more records to arrive
+MAX_BATCH = 64
+FLUSH_INTERVAL = 0.5
+
+# Routine "queued"/"saved" lines are only printed with DEBUG_MODE=true (errors always are)
+DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
+
+# Snapshot reads are cached for READ_CACHE_TTL seconds, at most READ_CACHE_SIZE entries
+READ_CACHE_TTL = 30.0
+READ_CACHE_SIZE = 128
+
+# Below this many samples plain Python is faster than building a numpy array
+NUMPY_MIN_SAMPLES = 512
+
+# Results longer than this are stored zstd-compressed (when zstandard is installed)
+COMPRESS_MIN_LENGTH = 1024
+
+# Optional zstandard for compressing large search results before upload
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstd = None
+    ZSTD_AVAILABLE = False
+
+# Optional orjson for the local JSON fallback files (much faster than stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Optional numpy for aggregating large voice histories
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
 # Safe import for Firebase (will be gracefully handled if not available)
 try:
     import firebase_admin
@@ -17,28 +73,110 @@ except ImportError:
     FIREBASE_AVAILABLE = False
     print("[INFO] Firebase Admin SDK not available - install with 'pip install firebase-admin'")
 
+def _read_json_file(filename: str) -> Any:
+    """Load a local JSON storage file (raises FileNotFoundError if missing)"""
+    if ORJSON_AVAILABLE:
+        with open(filename, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json_file(filename: str, data: Any):
+    """Write a local JSON storage file, pretty-printed, non-ASCII kept as UTF-8"""
+    if ORJSON_AVAILABLE:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+
+def _average_confidence(samples) -> float:
+    """Average the 'confidence' field of voice samples (a sized collection), using numpy for large histories"""
+    # Scores are streamed straight from the collection; nothing is copied first
+    scores = (s['confidence'] for s in samples if isinstance(s, dict) and 'confidence' in s)
+    
+    if NUMPY_AVAILABLE and len(samples) > NUMPY_MIN_SAMPLES:
+        confidences = np.fromiter(scores, dtype=np.float64, count=-1)
+        return float(confidences.mean()) if confidences.size else 0.0
+    
+    total = 0.0
+    count = 0
+    for score in scores:
+        total += score
+        count += 1
+    return total / count if count else 0.0
+
+
 class FirebaseManager:
     def __init__(self, config: Dict[str, str]):
         """
         Initialize Firebase connection with provided config
         
+        The connection itself is established lazily, on first use, so creating
+        a manager never pays for credential discovery.
+        
         Args:
             config: Firebase configuration dictionary with apiKey, projectId, etc.
         """
         self.config = config
         self.db = None
         self.app = None
-        self.connected = False
+        self._connected = False
+        self._init_pending = FIREBASE_AVAILABLE
+        # The flush thread and callers on other threads may all trigger the first init
+        self._init_lock = threading.Lock()
         
-        if FIREBASE_AVAILABLE:
-            try:
-                self._initialize_firebase()
-            except Exception as e:
-                print(f"[ERROR] Failed to initialize Firebase: {e}")
-                self.connected = False
-        else:
+        # One id for the lifetime of the manager so records of a run stay grouped
+        self._session_id = f"aiden_session_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        # initialize_app options are resolved once instead of in every auth attempt
+        database_url = config.get('databaseURL', DEFAULT_DATABASE_URL)
+        self._app_options = {
+            'projectId': config.get('projectId', DEFAULT_PROJECT_ID),
+            'databaseURL': database_url,
+        }
+        self._anonymous_app_options = {'databaseURL': database_url}
+        
+        # Conversation/search writes are queued and flushed in batches by a
+        # daemon thread so callers never wait on the network
+        self._write_queue = queue.Queue()
+        self._flush_thread = None
+        self._flush_thread_lock = threading.Lock()
+        
+        # (node, limit) -> (fetched_at, snapshot) for read-mostly queries
+        self._read_cache = OrderedDict()
+        self._read_cache_lock = threading.Lock()
+        
+        # zstd contexts are reused across writes/reads
+        self._zctx = zstd.ZstdCompressor(level=3) if ZSTD_AVAILABLE else None
+        self._zdctx = zstd.ZstdDecompressor() if ZSTD_AVAILABLE else None
+        
+        # Ring buffer of the last searches written by this instance; checked
+        # before Firebase so repeated/rephrased queries are answered from memory
+        self._recent = deque(maxlen=RECENT_SEARCHES_SIZE)
+        
+        if not FIREBASE_AVAILABLE:
             print("[WARNING] Firebase SDK not available - data will not be saved to Firebase")
     
+    @property
+    def connected(self) -> bool:
+        """Whether Firebase is usable; the first access triggers initialization"""
+        self._ensure_connected()
+        return self._connected
+    
+    def _ensure_connected(self):
+        """Run the Firebase initialization once, the first time it is needed"""
+        if self._init_pending:
+            with self._init_lock:
+                if self._init_pending:
+                    try:
+                        self._initialize_firebase()
+                    except Exception as e:
+                        print(f"[ERROR] Failed to initialize Firebase: {e}")
+                        self._connected = False
+                    # Cleared only once init is done, so other threads wait on the lock
+                    self._init_pending = False
+    
     def _initialize_firebase(self):
         """Initialize Firebase app and Realtime Database"""
         try:
@@ -72,7 +210,7 @@ class FirebaseManager:
             # Initialize Realtime Database
             try:
                 self.db = db.reference()
-                self.connected = True
+                self._connected = True
                 print(f"[SUCCESS] Connected to Firebase Realtime Database: {self.config.get('projectId', 'unknown')}")
             except Exception as db_error:
                 print(f"[ERROR] Database reference initialization failed: {db_error}")
@@ -87,7 +225,19 @@ class FirebaseManager:
             print("   Or download service account key to 'serviceAccountKey.json'")
             print("   Or set GOOGLE_APPLICATION_CREDENTIALS environment variable")
             print()
-            self.connected = False
+            self._connected = False
+    
+    def close(self):
+        """Flush pending writes and release the Firebase app and its pooled connections"""
+        self.flush_now()
+        if self.app:
+            try:
+                firebase_admin.delete_app(self.app)
+            except Exception:
+                pass
+            self.app = None
+        self.db = None
+        self._connected = False
     
     def _try_service_account_auth(self, service_account_path: str) -> bool:
         """Try to authenticate using a service account key file"""
@@ -95,10 +245,7 @@ class FirebaseManager:
         try:
             if os.path.exists(service_account_path):
                 cred = credentials.Certificate(service_account_path)
-                self.app = firebase_admin.initialize_app(cred, {
-                    'projectId': self.config.get('projectId', 'aiden-dd627'),
-                    'databaseURL': self.config.get('databaseURL', 'https://aiden-dd627-default-rtdb.firebaseio.com/')
-                })
+                self.app = firebase_admin.initialize_app(cred, self._app_options)
                 
                 # Test database access immediately
                 test_db = db.reference()
@@ -119,10 +266,7 @@ class FirebaseManager:
         """Try to authenticate using Application Default Credentials"""
         try:
             cred = credentials.ApplicationDefault()
-            self.app = firebase_admin.initialize_app(cred, {
-                'projectId': self.config.get('projectId', 'aiden-dd627'),
-                'databaseURL': self.config.get('databaseURL', 'https://aiden-dd627-default-rtdb.firebaseio.com/')
-            })
+            self.app = firebase_admin.initialize_app(cred, self._app_options)
             
             # Test database access immediately
             test_db = db.reference()
@@ -146,10 +290,7 @@ class FirebaseManager:
             if 'GOOGLE_APPLICATION_CREDENTIALS' in os.environ:
                 # This will use the credential file path from environment variable
                 cred = credentials.ApplicationDefault()
-                self.app = firebase_admin.initialize_app(cred, {
-                    'projectId': self.config.get('projectId', 'aiden-dd627'),
-                    'databaseURL': self.config.get('databaseURL', 'https://aiden-dd627-default-rtdb.firebaseio.com/')
-                })
+                self.app = firebase_admin.initialize_app(cred, self._app_options)
                 
                 # Test database access immediately
                 test_db = db.reference()
@@ -170,9 +311,7 @@ class FirebaseManager:
         """Try to initialize without credentials (for databases with public access)"""
         try:
             # Some Firebase databases allow read/write without authentication
-            self.app = firebase_admin.initialize_app(options={
-                'databaseURL': self.config.get('databaseURL', 'https://aiden-dd627-default-rtdb.firebaseio.com/')
-            })
+            self.app = firebase_admin.initialize_app(options=self._anonymous_app_options)
             
             # Test database access immediately
             test_db = db.reference()
@@ -202,7 +341,10 @@ class FirebaseManager:
             bool: True if saved successfully, False otherwise
         """
         if not self.connected:
-            return self._save_locally(query, result, source)
+            saved = self._save_locally(query, result, source)
+            if saved:
+                self._remember_search(query, result, source)
+            return saved
         
         try:
             doc_data = {
@@ -210,18 +352,169 @@ class FirebaseManager:
                 'result': result,
                 'source': source,
                 'timestamp': datetime.datetime.now().isoformat(),
-                'session_id': self._get_session_id()
+                'session_id': self._session_id
             }
             
-            # Save to 'searches' node in Realtime Database
-            searches_ref = self.db.child('searches')
-            new_search_ref = searches_ref.push(doc_data)
-            print(f"[Firebase] Search saved with key: {new_search_ref.key}")
+            # Long scrapes/AI answers are highly redundant text; compress them
+            if self._zctx and len(result) > COMPRESS_MIN_LENGTH:
+                compressed = self._zctx.compress(result.encode('utf-8'))
+                doc_data['result_zstd'] = base64.b64encode(compressed).decode('ascii')
+                del doc_data['result']
+            
+            # Queue for the 'searches' node in Realtime Database
+            key = self._enqueue_write('searches', doc_data,
+                                      lambda: self._save_locally(query, result, source))
+            if DEBUG_MODE:
+                print(f"[Firebase] Search queued with key: {key}")
+            self._remember_search(query, result, source, key)
             return True
             
         except Exception as e:
             print(f"[ERROR] Failed to save to Firebase Realtime Database: {e}")
-            return self._save_locally(query, result, source)
+            saved = self._save_locally(query, result, source)
+            if saved:
+                self._remember_search(query, result, source)
+            return saved
+    
+    def _enqueue_write(self, node: str, doc_data: Dict[str, Any], fallback) -> str:
+        """
+        Queue a record for the background batch writer
+        
+        Args:
+            node: Node path the record belongs to ('searches', 'voice_profiles/<user>')
+            doc_data: Record to store
+            fallback: Callable used to save the record locally if the batch fails
+        
+        Returns:
+            The key the record will be stored under (time-ordered, like push keys)
+        """
+        if self._flush_thread is None:
+            with self._flush_thread_lock:
+                if self._flush_thread is None:
+                    self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+                    self._flush_thread.start()
+        
+        key = f"{time.time_ns():016x}{uuid.uuid4().hex[:8]}"
+        self._write_queue.put((f"{node}/{key}", doc_data, fallback))
+        return key
+    
+    def _flush_loop(self):
+        """Drain the write queue, sending each batch as one multi-location update"""
+        while True:
+            batch = [self._write_queue.get()]
+            
+            # Give closely spaced writes a chance to join the same batch
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    def _write_batch(self, batch):
+        """Write a batch of queued records, falling back to local storage on failure"""
+        try:
+            self.db.update({path: doc_data for path, doc_data, _ in batch})
+            for node in {path.split('/', 1)[0] for path, _, _ in batch}:
+                self.invalidate(node)
+            if DEBUG_MODE:
+                print(f"[Firebase] Saved {len(batch)} record(s) in one batch")
+        except Exception as e:
+            print(f"[ERROR] Failed to write batch to Firebase Realtime Database: {e}")
+            for _, _, fallback in batch:
+                try:
+                    fallback()
+                except Exception as fallback_error:
+                    print(f"[ERROR] Local fallback failed: {fallback_error}")
+    
+    def flush_now(self):
+        """Block until every queued write has been sent (or saved locally)"""
+        if self._flush_thread is not None:
+            self._write_queue.join()
+    
+    def _get_recent_snapshot(self, node: str, limit: int) -> Dict[str, Any]:
+        """
+        Fetch the last `limit` records of a node ordered by timestamp, cached briefly
+        
+        Args:
+            node: Top-level node to read ('searches', 'conversations')
+            limit: Number of records to fetch
+        
+        Returns:
+            Snapshot dictionary (key -> record), possibly served from memory
+        """
+        key = (node, limit)
+        now = time.monotonic()
+        with self._read_cache_lock:
+            cached = self._read_cache.get(key)
+            if cached and now - cached[0] < READ_CACHE_TTL:
+                self._read_cache.move_to_end(key)
+                return cached[1]
+        
+        snapshot = self.db.child(node).order_by_child('timestamp').limit_to_last(limit).get() or {}
+        
+        with self._read_cache_lock:
+            self._read_cache[key] = (now, snapshot)
+            self._read_cache.move_to_end(key)
+            while len(self._read_cache) > READ_CACHE_SIZE:
+                self._read_cache.popitem(last=False)
+        return snapshot
+    
+    def invalidate(self, node: str):
+        """Drop cached reads of a node so new writes become visible"""
+        with self._read_cache_lock:
+            for key in [k for k in self._read_cache if k[0] == node]:
+                del self._read_cache[key]
+    
+    def _decode_result(self, data: Dict[str, Any]) -> str:
+        """Return the result text of a stored search, decompressing it if needed"""
+        if 'result_zstd' not in data:
+            return data.get('result', '')
+        
+        if not self._zdctx:
+            print("[WARNING] Compressed search result found but zstandard is not installed")
+            return ''
+        
+        compressed = base64.b64decode(data['result_zstd'])
+        return self._zdctx.decompress(compressed).decode('utf-8')
+    
+    def _remember_search(self, query: str, result: str, source: str, key: Optional[str] = None):
+        """Record a saved search in the in-memory ring buffer (oldest entries are evicted first)"""
+        self._recent.append({
+            'id': key,
+            'query': query,
+            'result': result,
+            'source': source,
+            'timestamp': datetime.datetime.now().isoformat(),
+            'tokens': frozenset(query.lower().split())
+        })
+    
+    def _search_recent(self, query_words: frozenset, limit: int) -> List[Dict[str, Any]]:
+        """Search the recently written results, newest first, without any network I/O"""
+        matches = []
+        for item in reversed(self._recent):
+            overlap = item['tokens'] & query_words
+            if overlap:
+                matches.append({
+                    'id': item['id'],
+                    'query': item['query'],
+                    'result': item['result'],
+                    'source': item['source'],
+                    'timestamp': item['timestamp'],
+                    'relevance_score': len(overlap)
+                })
+        
+        matches.sort(key=lambda x: x['relevance_score'], reverse=True)
+        return matches[:limit]
     
     def search_previous_results(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -234,19 +527,26 @@ class FirebaseManager:
         Returns:
             List of matching search results
         """
+        # Recently written searches are the most likely to be asked again
+        recent_matches = self._search_recent(frozenset(query.lower().split()), limit)
+        if len(recent_matches) >= limit:
+            return recent_matches
+        
+        remaining = limit - len(recent_matches)
+        seen = {(m['query'], m['result']) for m in recent_matches}
+        
         if not self.connected:
-            return self._search_locally(query, limit)
+            return recent_matches + self._search_locally_excluding(query, remaining, seen)
         
         try:
             # Search in Realtime Database for similar queries
             query_lower = query.lower()
             
             # Get recent searches from Realtime Database
-            searches_ref = self.db.child('searches')
-            all_searches = searches_ref.order_by_child('timestamp').limit_to_last(50).get()
+            all_searches = self._get_recent_snapshot('searches', 50)
             
             if not all_searches:
-                return []
+                return recent_matches
             
             matches = []
             
@@ -254,35 +554,40 @@ class FirebaseManager:
             for key, data in all_searches.items():
                 if not isinstance(data, dict):
                     continue
-                    
+                
+                result_text = self._decode_result(data)
                 stored_query = data.get('query', '').lower()
-                stored_result = data.get('result', '').lower()
+                stored_result = result_text.lower()
                 
                 # Simple keyword matching - can be enhanced with better search algorithms
                 query_words = set(query_lower.split())
                 stored_words = set(stored_query.split())
                 
+                # Skip entries already answered from the in-memory buffer
+                if (data.get('query'), result_text) in seen:
+                    continue
+                
                 # Check if there's overlap in keywords
                 if query_words.intersection(stored_words) or any(word in stored_result for word in query_words):
                     matches.append({
                         'id': key,
                         'query': data.get('query'),
-                        'result': data.get('result'),
+                        'result': result_text,
                         'source': data.get('source'),
                         'timestamp': data.get('timestamp'),
                         'relevance_score': len(query_words.intersection(stored_words))
                     })
                 
-                if len(matches) >= limit:
+                if len(matches) >= remaining:
                     break
             
             # Sort by relevance score
             matches.sort(key=lambda x: x['relevance_score'], reverse=True)
-            return matches[:limit]
+            return recent_matches + matches[:remaining]
             
         except Exception as e:
             print(f"[ERROR] Failed to search Firebase Realtime Database: {e}")
-            return self._search_locally(query, limit)
+            return recent_matches + self._search_locally_excluding(query, remaining, seen)
     
     def save_conversation(self, user_input: str, ai_response: str) -> bool:
         """
@@ -303,13 +608,14 @@ class FirebaseManager:
                 'user_input': user_input,
                 'ai_response': ai_response,
                 'timestamp': datetime.datetime.now().isoformat(),
-                'session_id': self._get_session_id()
+                'session_id': self._session_id
             }
             
-            # Save to 'conversations' node in Realtime Database
-            conversations_ref = self.db.child('conversations')
-            new_conversation_ref = conversations_ref.push(doc_data)
-            print(f"[Firebase] Conversation saved with key: {new_conversation_ref.key}")
+            # Queue for the 'conversations' node in Realtime Database
+            key = self._enqueue_write('conversations', doc_data,
+                                      lambda: self._save_conversation_locally(user_input, ai_response))
+            if DEBUG_MODE:
+                print(f"[Firebase] Conversation queued with key: {key}")
             return True
             
         except Exception as e:
@@ -331,13 +637,18 @@ class FirebaseManager:
             return self._save_voice_sample_locally(user_id, voice_data)
         
         try:
-            voice_data['timestamp'] = datetime.datetime.now().isoformat()
-            voice_data['session_id'] = self._get_session_id()
+            # Work on a copy so the caller's dict is never modified
+            payload = {
+                **voice_data,
+                'timestamp': datetime.datetime.now().isoformat(),
+                'session_id': self._session_id
+            }
             
-            # Save to 'voice_profiles' node in Realtime Database
-            voice_ref = self.db.child('voice_profiles').child(user_id)
-            voice_ref.push(voice_data)
-            print(f"[Firebase] Voice sample saved for user: {user_id}")
+            # Queue for the user's 'voice_profiles' node in Realtime Database
+            self._enqueue_write(f'voice_profiles/{user_id}', payload,
+                                lambda: self._save_voice_sample_locally(user_id, voice_data))
+            if DEBUG_MODE:
+                print(f"[Firebase] Voice sample queued for user: {user_id}")
             return True
             
         except Exception as e:
@@ -358,25 +669,16 @@ class FirebaseManager:
             return self._get_voice_profile_locally(user_id)
         
         try:
+            # Push keys are time-ordered, so the last key is the most recent
+            # profile; let the server pick it instead of downloading them all
             voice_ref = self.db.child('voice_profiles').child(user_id)
-            voice_data = voice_ref.get()
-            
-            if voice_data:
-                # Get the most recent voice profile
-                if isinstance(voice_data, dict):
-                    latest_key = max(voice_data.keys())
-                    return voice_data[latest_key]
-                    
-            return {}
+            latest = voice_ref.order_by_key().limit_to_last(1).get() or {}
+            return next(iter(latest.values()), {})
             
         except Exception as e:
             print(f"[ERROR] Failed to get voice profile from Firebase: {e}")
             return self._get_voice_profile_locally(user_id)
     
-    def _get_session_id(self) -> str:
-        """Generate a session ID for grouping related interactions"""
-        return f"aiden_session_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    
     def _save_locally(self, query: str, result: str, source: str) -> bool:
         """Fallback method to save data locally when Firebase is unavailable"""
         try:
@@ -390,8 +692,7 @@ class FirebaseManager:
             
             # Read existing data
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
+                existing_data = _read_json_file(filename)
             except FileNotFoundError:
                 existing_data = []
             
@@ -399,8 +700,7 @@ class FirebaseManager:
             existing_data.append(data)
             
             # Write back
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, indent=2, ensure_ascii=False, default=str)
+            _write_json_file(filename, existing_data)
             
             print(f"[Local] Search saved to {filename}")
             return True
@@ -415,8 +715,7 @@ class FirebaseManager:
             filename = f"aiden_searches_{datetime.datetime.now().strftime('%Y%m%d')}.json"
             
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = _read_json_file(filename)
             except FileNotFoundError:
                 return []
             
@@ -437,6 +736,11 @@ class FirebaseManager:
             print(f"[ERROR] Failed to search locally: {e}")
             return []
     
+    def _search_locally_excluding(self, query: str, limit: int, seen: set) -> List[Dict[str, Any]]:
+        """Local search that skips (query, result) pairs already returned from memory"""
+        local_matches = self._search_locally(query, limit + len(seen))
+        return [m for m in local_matches if (m.get('query'), m.get('result')) not in seen][:limit]
+    
     def _save_conversation_locally(self, user_input: str, ai_response: str) -> bool:
         """Fallback method to save conversations locally"""
         try:
@@ -449,8 +753,7 @@ class FirebaseManager:
             
             # Read existing data
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
+                existing_data = _read_json_file(filename)
             except FileNotFoundError:
                 existing_data = []
             
@@ -458,8 +761,7 @@ class FirebaseManager:
             existing_data.append(data)
             
             # Write back
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, indent=2, ensure_ascii=False, default=str)
+            _write_json_file(filename, existing_data)
             
             return True
             
@@ -471,21 +773,19 @@ class FirebaseManager:
         """Fallback method to save voice samples locally"""
         try:
             filename = f"aiden_voice_profiles_{user_id}.json"
-            voice_data['timestamp'] = datetime.datetime.now().isoformat()
+            payload = {**voice_data, 'timestamp': datetime.datetime.now().isoformat()}
             
             # Read existing data
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
+                existing_data = _read_json_file(filename)
             except FileNotFoundError:
                 existing_data = []
             
             # Append new data
-            existing_data.append(voice_data)
+            existing_data.append(payload)
             
             # Write back
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, indent=2, ensure_ascii=False, default=str)
+            _write_json_file(filename, existing_data)
             
             print(f"[Local] Voice sample saved to {filename}")
             return True
@@ -516,7 +816,7 @@ class FirebaseManager:
             
             # Process voice learning data
             total_samples = len(voice_data)
-            confidence_scores = []
+            avg_confidence = _average_confidence(voice_data.values())
             recent_samples = []
             
             import datetime
@@ -524,10 +824,6 @@ class FirebaseManager:
             
             for key, sample in voice_data.items():
                 if isinstance(sample, dict):
-                    # Collect confidence scores
-                    if 'confidence' in sample:
-                        confidence_scores.append(sample['confidence'])
-                    
                     # Check for recent samples
                     timestamp_str = sample.get('timestamp')
                     if timestamp_str:
@@ -538,9 +834,6 @@ class FirebaseManager:
                         except:
                             pass
             
-            # Calculate statistics
-            avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
-            
             stats = {
                 'total_voice_samples': total_samples,
                 'average_confidence': avg_confidence,
@@ -570,12 +863,15 @@ class FirebaseManager:
             return self._update_voice_preferences_locally(user_id, preferences)
         
         try:
-            preferences['timestamp'] = datetime.datetime.now().isoformat()
-            preferences['type'] = 'voice_preferences'
+            payload = {
+                **preferences,
+                'timestamp': datetime.datetime.now().isoformat(),
+                'type': 'voice_preferences'
+            }
             
             # Save to user preferences node
             prefs_ref = self.db.child('user_preferences').child(user_id).child('voice')
-            prefs_ref.set(preferences)
+            prefs_ref.set(payload)
             
             print(f"[Firebase] Voice preferences updated for user: {user_id}")
             return True
@@ -613,10 +909,9 @@ class FirebaseManager:
             filename = f"aiden_voice_profiles_{user_id}.json"
             
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Return the most recent profile
-                    return data[-1] if data else {}
+                data = _read_json_file(filename)
+                # Return the most recent profile
+                return data[-1] if data else {}
             except FileNotFoundError:
                 return {}
             
@@ -630,8 +925,7 @@ class FirebaseManager:
             filename = f"aiden_voice_profiles_{user_id}.json"
             
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = _read_json_file(filename)
             except FileNotFoundError:
                 return {'message': 'No voice learning data found locally'}
             
@@ -640,8 +934,7 @@ class FirebaseManager:
             
             # Calculate basic stats
             total_samples = len(data)
-            confidence_scores = [d.get('confidence', 0) for d in data if 'confidence' in d]
-            avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
+            avg_confidence = _average_confidence(data)
             
             # Recent samples (last week)
             import datetime
@@ -674,10 +967,9 @@ class FirebaseManager:
         """Fallback method to update voice preferences locally"""
         try:
             filename = f"aiden_voice_preferences_{user_id}.json"
-            preferences['timestamp'] = datetime.datetime.now().isoformat()
+            payload = {**preferences, 'timestamp': datetime.datetime.now().isoformat()}
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(preferences, f, indent=2, ensure_ascii=False)
+            _write_json_file(filename, payload)
             
             print(f"[Local] Voice preferences saved to {filename}")
             return True
@@ -692,8 +984,7 @@ class FirebaseManager:
             filename = f"aiden_voice_preferences_{user_id}.json"
             
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return _read_json_file(filename)
             except FileNotFoundError:
                 return {}
             
@@ -715,10 +1006,21 @@ FIREBASE_CONFIG = {
 }
 
 
+# Shared manager so every caller reuses the same Firebase app/connection
+_firebase_manager: Optional[FirebaseManager] = None
+_firebase_manager_lock = threading.Lock()
+
+
 # Convenience function to get Firebase manager instance
 def get_firebase_manager() -> FirebaseManager:
-    """Get a Firebase manager instance with the default config"""
-    return FirebaseManager(FIREBASE_CONFIG)
+    """Get the process-wide Firebase manager with the default config"""
+    global _firebase_manager
+    if _firebase_manager is None:
+        with _firebase_manager_lock:
+            if _firebase_manager is None:
+                _firebase_manager = FirebaseManager(FIREBASE_CONFIG)
+                atexit.register(_firebase_manager.close)
+    return _firebase_manager
 
 
 if __name__ == "__main__":
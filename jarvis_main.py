@@ -7,9 +7,11 @@ This module integrates all JARVIS capabilities with graceful fallbacks for missi
 """
 
 import os
+import re
 import sys
 import json
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
 
 # Import JARVIS core
@@ -38,13 +40,17 @@ except ImportError:
     print("[INFO] Text-to-speech not available - text-only mode")
 
 try:
-    from web_scraper import scrape_static_page
+    from web_scraper import google_snippets
     WEB_SCRAPING_AVAILABLE = True
 except ImportError:
     WEB_SCRAPING_AVAILABLE = False
     print("[INFO] Web scraping not available - using fallback")
 
 
+# Consecutive unrecognized utterances before the microphone is recalibrated
+RECALIBRATE_AFTER = 3
+
+
 class JARVIS:
     """
     Just A Rather Very Intelligent System
@@ -57,11 +63,51 @@ class JARVIS:
     - Professional, respectful interface
     """
     
+    # Static preamble for Gemini requests; only the user query is appended per turn
+    _JARVIS_PROMPT_PREFIX = (
+        "You are JARVIS (Just A Rather Very Intelligent System), Tony Stark's AI assistant from Iron Man. \n"
+        "Respond in JARVIS's characteristic style: professional, intelligent, slightly formal, and helpful. \n"
+        "Address the user as 'Sir' and provide detailed, technical responses when appropriate.\n"
+        "\n"
+        "User query: "
+    )
+    
+    # Single-word triggers, matched against the tokenized command (plural forms
+    # listed explicitly, since whole tokens no longer match them as substrings did)
+    _CORE_KEYWORDS = frozenset({
+        "status", "diagnóstico", "diagnósticos", "diagnostic", "diagnostics",
+        "sistema", "sistemas", "system", "systems",
+        "arquivo", "arquivos", "file", "files", "diretório", "diretórios",
+        "directory", "directories", "pasta", "pastas", "folder", "folders",
+        "tempo", "time", "data", "date", "dates", "processo", "processos", "process", "processes",
+        "memória", "memory", "performance", "desempenho", "ajuda", "help"
+    })
+    _RESEARCH_KEYWORDS = frozenset({"pesquisar", "procurar", "buscar", "search", "research"})
+    _RESEARCH_STRIP_RE = re.compile(r"\b(?:pesquisar|procurar|buscar|search|research)\b", re.I)
+    _EXIT_COMMANDS = frozenset({"sair", "exit", "quit", "goodbye"})
+    _TOKEN_RE = re.compile(r"\w+")
+    
+    # Fallback-response categories, one word-bounded pattern each
+    _PAT_GREETING = re.compile(r"\b(?:olá|oi|hello|hi|bom dia|boa tarde|boa noite)\b", re.I)
+    _PAT_QUESTION = re.compile(r"\?\s*$|\b(?:como|what|how|why|quando|where)\b", re.I)
+    _PAT_TASK = re.compile(r"\b(?:fazer|criar|do|create|make|execute)\b", re.I)
+    _PAT_LEARNING = re.compile(r"\b(?:saber|conhecer|learn|know|ensinar|teach)\b", re.I)
+    
     def __init__(self, user_name: str = "Sir", gemini_api_key: Optional[str] = None):
         self.user_name = user_name
         self.jarvis_core = JarvisCore(user_name)
         self.session_start = datetime.datetime.now()
         self.conversation_history = []
+        self._user_input_count = 0
+        
+        # Session log is appended one JSON line per entry, opened on first write
+        self._log_path = f"jarvis_session_{self.session_start.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self._log_file = None
+        
+        # Speech is synthesized on a single worker thread (keeps utterances in
+        # order and the TTS engine on one thread) so typing can overlap playback
+        self._speech_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-tts")
+        self._speech_future = None
         
         # Initialize advanced AI if available
         self.conversational_ai = None
@@ -79,9 +125,12 @@ class JARVIS:
             try:
                 self.speech_recognizer = sr.Recognizer()
                 self.microphone = sr.Microphone()
+                self.speech_recognizer.dynamic_energy_threshold = True
+                self._calibrate_microphone()
                 print("[INFO] Voice recognition capabilities initialized")
             except Exception as e:
                 print(f"[WARNING] Voice recognition initialization failed: {e}")
+        self._unrecognized_streak = 0
         
         # System capabilities report
         self.capabilities = {
@@ -97,20 +146,25 @@ class JARVIS:
     
     def start_session(self) -> str:
         """Initialize JARVIS session with comprehensive greeting"""
-        greeting = self.jarvis_core.greet()
+        parts = [self.jarvis_core.greet()]
         
         # Add capability report
-        greeting += f"\n\nCapability Status Report:"
+        parts.append("\n\nCapability Status Report:")
         for capability, status in self.capabilities.items():
             status_icon = "🟢" if status else "🔴"
-            greeting += f"\n{status_icon} {capability.replace('_', ' ').title()}: {'Online' if status else 'Offline'}"
+            parts.append(f"\n{status_icon} {capability.replace('_', ' ').title()}: {'Online' if status else 'Offline'}")
         
         if not self.capabilities["advanced_ai"]:
-            greeting += f"\n\n[Note] Advanced AI features require Gemini API key. Set GOOGLE_API_KEY environment variable for enhanced capabilities."
+            parts.append("\n\n[Note] Advanced AI features require Gemini API key. Set GOOGLE_API_KEY environment variable for enhanced capabilities.")
         
-        greeting += f"\n\nI am ready to assist you, {self.user_name}. How may I help you today?"
+        parts.append(f"\n\nI am ready to assist you, {self.user_name}. How may I help you today?")
         
-        return greeting
+        return "".join(parts)
+    
+    def _calibrate_microphone(self) -> None:
+        """Measure the ambient noise floor once; the dynamic threshold tracks it afterwards"""
+        with self.microphone as source:
+            self.speech_recognizer.adjust_for_ambient_noise(source, duration=1.0)
     
     def listen(self) -> str:
         """
@@ -118,18 +172,28 @@ class JARVIS:
         Falls back gracefully to text input if voice is unavailable
         """
         if self.capabilities["voice_recognition"]:
+            # Don't let the microphone pick up JARVIS still speaking
+            self._wait_for_speech()
             try:
                 with self.microphone as source:
-                    self.speech_recognizer.adjust_for_ambient_noise(source)
                     print("🎤 Listening...")
                     
                     audio = self.speech_recognizer.listen(source, timeout=5, phrase_time_limit=10)
                     text = self.speech_recognizer.recognize_google(audio, language='pt-BR')
                     print(f"🗣️  Recognized: {text}")
+                    self._unrecognized_streak = 0
                     return text
                     
             except sr.UnknownValueError:
                 print("❓ Could not understand audio. Please try again or type your request.")
+                # Repeated misses usually mean the noise floor changed
+                self._unrecognized_streak += 1
+                if self._unrecognized_streak >= RECALIBRATE_AFTER:
+                    self._unrecognized_streak = 0
+                    try:
+                        self._calibrate_microphone()
+                    except Exception as e:
+                        print(f"[WARNING] Microphone recalibration failed: {e}")
                 return self._get_text_input()
             except sr.RequestError as e:
                 print(f"❌ Speech recognition service error: {e}")
@@ -152,55 +216,60 @@ class JARVIS:
         Output text via speech or text with JARVIS formatting
         """
         # Format response with JARVIS styling
-        formatted_text = f"🤖 JARVIS: {text}"
-        print(formatted_text)
+        sys.stdout.write(f"🤖 JARVIS: {text}\n")
         
-        # Attempt text-to-speech if available
+        # Attempt text-to-speech if available, in the background
         if self.capabilities["text_to_speech"]:
-            try:
-                speak_text(text, method='offline')
-            except Exception as e:
-                print(f"[TTS Error] {e}")
+            sys.stdout.flush()
+            self._speech_future = self._speech_executor.submit(self._speak_blocking, text)
+    
+    @staticmethod
+    def _speak_blocking(text: str) -> None:
+        """Run text-to-speech to completion (executed on the speech worker)"""
+        try:
+            speak_text(text, method='offline')
+        except Exception as e:
+            print(f"[TTS Error] {e}")
+    
+    def _wait_for_speech(self) -> None:
+        """Block until everything queued for speech has been spoken"""
+        if self._speech_future is not None:
+            self._speech_future.result()
+            self._speech_future = None
     
     def process_command(self, command: str) -> str:
         """
         Process user commands with enhanced intelligence
         Combines JARVIS core capabilities with advanced AI when available
         """
-        if not command or command.lower() in ['sair', 'exit', 'quit', 'goodbye']:
+        if not command:
+            return self.shutdown()
+        command_lower = command.lower()
+        if command_lower in self._EXIT_COMMANDS:
             return self.shutdown()
+        tokens = set(self._TOKEN_RE.findall(command_lower))
         
         # Log conversation
-        self.conversation_history.append({
+        self._log_entry({
             "timestamp": datetime.datetime.now().isoformat(),
             "user": command,
             "type": "user_input"
         })
+        self._user_input_count += 1
         
         # Check for core JARVIS commands first
-        core_keywords = [
-            "status", "diagnóstico", "diagnostics", "sistema", "system",
-            "arquivo", "file", "diretório", "directory", "pasta", "folder",
-            "tempo", "time", "data", "date", "processo", "process",
-            "memória", "memory", "performance", "desempenho", "ajuda", "help"
-        ]
-        
-        if any(keyword in command.lower() for keyword in core_keywords):
+        if tokens & self._CORE_KEYWORDS:
             response = self.jarvis_core.process_command(command)
         
         # Web research commands
-        elif any(keyword in command.lower() for keyword in ["pesquisar", "procurar", "buscar", "search", "research"]):
-            response = self._handle_research(command)
+        elif tokens & self._RESEARCH_KEYWORDS:
+            response = self._handle_research(command, command_lower)
         
         # Advanced AI conversation
         elif self.capabilities["advanced_ai"]:
             try:
                 # Enhance prompt for JARVIS-like responses
-                enhanced_prompt = f"""You are JARVIS (Just A Rather Very Intelligent System), Tony Stark's AI assistant from Iron Man. 
-Respond in JARVIS's characteristic style: professional, intelligent, slightly formal, and helpful. 
-Address the user as 'Sir' and provide detailed, technical responses when appropriate.
-
-User query: {command}"""
+                enhanced_prompt = self._JARVIS_PROMPT_PREFIX + command
                 
                 response = self.conversational_ai.send_message(enhanced_prompt)
                 
@@ -216,7 +285,7 @@ User query: {command}"""
             response = self._generate_fallback_response(command)
         
         # Log response
-        self.conversation_history.append({
+        self._log_entry({
             "timestamp": datetime.datetime.now().isoformat(),
             "jarvis": response,
             "type": "jarvis_response"
@@ -224,27 +293,35 @@ User query: {command}"""
         
         return response
     
-    def _handle_research(self, command: str) -> str:
-        """Handle web research requests"""
-        query = command.lower()
-        for term in ["pesquisar", "procurar", "buscar", "search", "research"]:
-            query = query.replace(term, "").strip()
+    def _log_entry(self, entry: Dict[str, Any]) -> None:
+        """Record a history entry in memory and append it to the session log"""
+        self.conversation_history.append(entry)
+        try:
+            if self._log_file is None:
+                self._log_file = open(self._log_path, 'a', encoding='utf-8')
+            self._log_file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._log_file.flush()
+        except Exception as e:
+            print(f"[WARNING] Failed to write session log: {e}")
+    
+    def _handle_research(self, command: str, command_lower: Optional[str] = None) -> str:
+        """Handle web research requests (command_lower: the command already lowercased)"""
+        if command_lower is None:
+            command_lower = command.lower()
+        query = " ".join(self._RESEARCH_STRIP_RE.sub(" ", command_lower).split())
         
         response = f"Initiating web research for: '{query}', {self.user_name}.\n\n"
         
         if self.capabilities["web_research"]:
             try:
                 # Perform web search
-                search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-                soup = scrape_static_page(search_url)
+                snippets = google_snippets(query, limit=3)
                 
-                if soup:
+                if snippets is not None:
                     # Try to extract search results
-                    snippets = soup.find_all("div", class_="BNeawe s3v9rd AP7Wnd")[:3]
                     if snippets:
                         response += "🔍 Research Results:\n\n"
-                        for i, snippet in enumerate(snippets, 1):
-                            response += f"{i}. {snippet.get_text()}\n\n"
+                        response += "".join(f"{i}. {snippet}\n\n" for i, snippet in enumerate(snippets, 1))
                     else:
                         response += "Research completed, but I was unable to extract clear results from the current search format."
                 else:
@@ -259,22 +336,20 @@ User query: {command}"""
     
     def _generate_fallback_response(self, command: str) -> str:
         """Generate intelligent fallback responses when advanced AI is unavailable"""
-        command_lower = command.lower()
-        
         # Greeting responses
-        if any(word in command_lower for word in ["olá", "oi", "hello", "hi", "bom dia", "boa tarde", "boa noite"]):
+        if self._PAT_GREETING.search(command):
             return f"Hello, {self.user_name}. I am JARVIS, your AI assistant. How may I be of service today?"
         
         # Question responses
-        elif command_lower.endswith("?") or any(word in command_lower for word in ["como", "what", "how", "why", "quando", "where"]):
+        elif self._PAT_QUESTION.search(command):
             return f"That's an intriguing question, {self.user_name}. While I don't have access to my full knowledge database at the moment, I can assist you with system operations, file management, and diagnostics. Would you like me to help with any of those areas?"
         
         # Task requests
-        elif any(word in command_lower for word in ["fazer", "criar", "do", "create", "make", "execute"]):
+        elif self._PAT_TASK.search(command):
             return f"I understand you'd like me to perform a task, {self.user_name}. My current operational parameters allow for system monitoring, file management, and diagnostic functions. Please specify what type of operation you'd like me to perform."
         
         # Learning/knowledge requests
-        elif any(word in command_lower for word in ["saber", "conhecer", "learn", "know", "ensinar", "teach"]):
+        elif self._PAT_LEARNING.search(command):
             return f"Knowledge acquisition is indeed important, {self.user_name}. While my advanced learning systems are currently offline, I maintain comprehensive operational knowledge about system administration and diagnostics. How may I share this expertise with you?"
         
         # Default intelligent response
@@ -285,30 +360,34 @@ User query: {command}"""
         """JARVIS shutdown sequence"""
         session_duration = datetime.datetime.now() - self.session_start
         
-        shutdown_message = f"\nInitiating shutdown sequence, {self.user_name}.\n\n"
-        shutdown_message += f"Session Summary:\n"
-        shutdown_message += f"• Duration: {session_duration}\n"
-        shutdown_message += f"• Interactions: {len([h for h in self.conversation_history if h['type'] == 'user_input'])}\n"
+        parts = [
+            f"\nInitiating shutdown sequence, {self.user_name}.\n\n",
+            "Session Summary:\n",
+            f"• Duration: {session_duration}\n",
+            f"• Interactions: {self._user_input_count}\n",
+        ]
         
-        # Save conversation history
+        # Close the session log with a summary record
         try:
-            history_file = f"jarvis_session_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "session_start": self.session_start.isoformat(),
-                    "session_duration": str(session_duration),
-                    "user_name": self.user_name,
-                    "capabilities": self.capabilities,
-                    "conversation_history": self.conversation_history
-                }, f, indent=2, ensure_ascii=False)
-            shutdown_message += f"• Session log saved: {history_file}\n"
+            if self._log_file is None:
+                self._log_file = open(self._log_path, 'a', encoding='utf-8')
+            self._log_file.write(json.dumps({
+                "type": "session_end",
+                "session_start": self.session_start.isoformat(),
+                "session_duration": str(session_duration),
+                "user_name": self.user_name,
+                "capabilities": self.capabilities
+            }, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._log_file.close()
+            self._log_file = None
+            parts.append(f"• Session log saved: {self._log_path}\n")
         except Exception as e:
-            shutdown_message += f"• Session log: Unable to save ({str(e)})\n"
+            parts.append(f"• Session log: Unable to save ({str(e)})\n")
         
-        shutdown_message += f"\nAll systems nominal. JARVIS offline.\n"
-        shutdown_message += f"Until next time, {self.user_name}. It has been my pleasure to assist you."
+        parts.append("\nAll systems nominal. JARVIS offline.\n")
+        parts.append(f"Until next time, {self.user_name}. It has been my pleasure to assist you.")
         
-        return shutdown_message
+        return "".join(parts)
     
     def run(self):
         """Main JARVIS execution loop"""
@@ -338,6 +417,9 @@ User query: {command}"""
         except Exception as e:
             print(f"\nCritical error in JARVIS main system: {e}")
             print("Emergency shutdown initiated.")
+        finally:
+            # Let the farewell finish before the process exits
+            self._speech_executor.shutdown(wait=True)
 
 
 def main():
@@ -1,5 +1,13 @@
 import os
+import re
 import sys
+import queue
+import threading
+import datetime
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from sentences import iter_sentences
 
 # Safe imports with fallbacks for enhanced JARVIS mode
 try:
@@ -11,25 +19,45 @@ except ImportError:
     print("[INFO] Speech recognition not available - using text mode")
 
 try:
-    from conversational_ai import ConversationalAI
+    from conversational_ai import ConversationalAI, is_time_question
     CONVERSATIONAL_AI_AVAILABLE = True
 except ImportError:
     CONVERSATIONAL_AI_AVAILABLE = False
     print("[INFO] Conversational AI not available - using basic responses")
 
 try:
-    from text_to_speech import speak_text
+    from text_to_speech import (speak_text, stop_speaking, split_for_speech, warm_up,
+                                synthesize_online, play_synthesized, discard_synthesized)
     TEXT_TO_SPEECH_AVAILABLE = True
 except ImportError:
     TEXT_TO_SPEECH_AVAILABLE = False
     print("[INFO] Text-to-speech not available - text only mode")
 
+# web_scraper pulls in requests, BeautifulSoup and lxml but is only needed for
+# searches, so it is imported on the first one (see _load_web_scraper)
+_web_scraper = None  # None: not tried yet, False: unavailable
+
+# Enhanced recognition (voice learning, Cloud streaming, Silero VAD capture)
+try:
+    from voice_recognition import (recognize_audio, streaming_stt_enabled, stream_recognize_from_mic,
+                                   whisper_stt_enabled, load_whisper_model,
+                                   VAD_ENABLED, VAD_SAMPLE_RATE, capture_utterance_vad_from_source)
+    VOICE_RECOGNITION_AVAILABLE = True
+except ImportError:
+    VOICE_RECOGNITION_AVAILABLE = False
+    VAD_ENABLED = False
+
 try:
-    from web_scraper import scrape_static_page, scrape_dynamic_page
-    WEB_SCRAPER_AVAILABLE = True
+    from semantic_cache import SemanticCache, SEMANTIC_CACHE_AVAILABLE, SEMANTIC_CACHE_ENABLED
 except ImportError:
-    WEB_SCRAPER_AVAILABLE = False
-    print("[INFO] Web scraper not available")
+    SEMANTIC_CACHE_AVAILABLE = SEMANTIC_CACHE_ENABLED = False
+
+try:
+    from firebase_integration import get_firebase_manager
+    FIREBASE_AVAILABLE = True
+except ImportError:
+    FIREBASE_AVAILABLE = False
+    print("[INFO] Firebase integration not available")
 
 # Import AIDEN core for enhanced capabilities
 try:
@@ -51,7 +79,86 @@ else:
     if os.getenv("GOOGLE_API_KEY") is None and os.getenv("GEMINI_API_KEY") is None:
         print("[Aviso] python-dotenv não instalado. Use 'pip install python-dotenv' ou defina a variável de ambiente manualmente.")
 
+# AIDEN system-command keywords, matched in one case-insensitive scan
+AIDEN_KEYWORDS_RE = re.compile(
+    r"\b(?:status|diagnósticos?|diagnostics?|sistemas?|systems?|arquivos?|files?|diretórios?|"
+    r"director(?:y|ies)|pastas?|folders?|tempos?|times?|datas?|dates?|processos?|process(?:es)?|"
+    r"memórias?|memor(?:y|ies)|performance|desempenho|informaç(?:ão|ões)|informations?)\b",
+    re.IGNORECASE,
+)
+
+# Search trigger words; also removed from the command to form the query
+SEARCH_TRIGGER_RE = re.compile(r"\b(?:pesquisar|procurar)\b", re.IGNORECASE)
+
+# Fallback reply triggers (substring matches, as before), scanned in one pass each
+FALLBACK_GREETING_RE = re.compile(r"olá|oi|hello|hi", re.IGNORECASE)
+FALLBACK_QUESTION_RE = re.compile(r"\?|como|what|why|quando", re.IGNORECASE)
+
+# Whole-command intents answered directly instead of by Gemini
+DIRECT_GREETING_RE = re.compile(r"^(?:oi|olá|ola|hello|hi|hey|bom dia|boa tarde|boa noite)(?:,? aiden)?[!.]*$", re.IGNORECASE)
+DIRECT_THANKS_RE = re.compile(r"^(?:muito )?(?:obrigad[oa]|valeu|thanks|thank you)(?:,? aiden)?[!.]*$", re.IGNORECASE)
+DIRECT_TIME_RE = re.compile(r"^(?:que|quais) horas? (?:são|é|sao|e)(?: agora)?\??$|^what time is it\??$", re.IGNORECASE)
+DIRECT_DATE_RE = re.compile(r"^(?:que|qual) (?:dia|data) é hoje\??$|^(?:qual|que) a data de hoje\??$|^what(?:'s| is) the date(?: today)?\??$", re.IGNORECASE)
+
+# Routine per-turn status lines are only printed with DEBUG_MODE=true
+DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
+
+# Commands that end the session
+EXIT_COMMANDS = frozenset({"parar", "sair", "exit", "quit"})
+EXIT_COMMAND_MAX_LENGTH = max(map(len, EXIT_COMMANDS))
+
+# Consecutive failed listens before the microphone is recalibrated
+RECALIBRATE_AFTER = 3
+
+# With barge-in enabled, speech captured while AIDEN is talking interrupts it;
+# otherwise that audio is treated as echo and dropped (needs headphones or AEC to enable)
+BARGE_IN_ENABLED = os.getenv("AIDEN_BARGE_IN", "0") == "1"
+
+# Seconds listen() waits for a captured phrase before returning empty
+LISTEN_TIMEOUT = 10
+
+# Online TTS chunks of a long reply synthesized ahead of playback (and concurrently)
+SYNTH_AHEAD = 3
+
+# While a Gemini reply is being spoken, the answer to a generic "tell me more"
+# follow-up can be generated in the background (AIDEN_PREFETCH=1; costs API
+# tokens, so at most AIDEN_PREFETCH_BUDGET prefetches per session)
+PREFETCH_ENABLED = os.getenv("AIDEN_PREFETCH", "0") == "1"
+PREFETCH_BUDGET = int(os.getenv("AIDEN_PREFETCH_BUDGET", "20"))
+FOLLOWUP_PROMPT = "Me dê mais detalhes sobre isso."
+# How long a follow-up waits for an unfinished prefetch before asking Gemini normally (seconds)
+PREFETCH_WAIT = 1.0
+FOLLOWUP_RE = re.compile(
+    r"^(?:(?:me )?(?:d[êe] |fale |conte )?mais(?: detalhes)?(?: sobre isso)?|continu[ea]|"
+    r"explique melhor|pode continuar|tell me more|more details|go on)[.!?]*$",
+    re.IGNORECASE,
+)
+
+# Shorter inputs aren't worth a conversation record in Firebase
+MIN_SAVED_INPUT_LENGTH = 3
+
+# Replies of deterministic commands (static AIDEN core answers, offline fallbacks) kept for reuse
+EXACT_CACHE_SIZE = 256
+
+def _load_web_scraper():
+    """The web_scraper module, imported on first use; None if its dependencies are missing"""
+    global _web_scraper
+    if _web_scraper is None:
+        try:
+            import web_scraper
+            _web_scraper = web_scraper
+        except ImportError:
+            _web_scraper = False
+            print("[INFO] Web scraper not available")
+    return _web_scraper or None
+
 class ManusAI:
+    # AIDEN-mode guidance added to Gemini's system instruction
+    _AIDEN_INSTRUCTIONS = (
+        "Dirija-se ao usuário como '{user_name}' e forneça respostas detalhadas quando apropriado.\n"
+        "Seja conversacional, mas informativo, como um assistente digital sofisticado."
+    )
+    
     def __init__(self, gemini_api_key, enable_aiden_mode=True, user_name="User"):
         """
         Initialize ManusAI with optional AIDEN enhancement
@@ -63,6 +170,41 @@ class ManusAI:
         """
         self.enable_aiden_mode = enable_aiden_mode and AIDEN_CORE_AVAILABLE
         self.user_name = user_name
+        # Per-instance constants used every turn
+        self._input_prompt = f"\n{user_name}: " if self.enable_aiden_mode else "Digite: "
+        self._tone_re = re.compile(rf"{re.escape(user_name)}|usuário", re.IGNORECASE)
+        # Mode-dependent wording, chosen once instead of branching on every reply
+        if self.enable_aiden_mode:
+            self._reply_prefix = "🤖 AIDEN: "
+            self._search_ack = lambda query: f"Iniciando pesquisa para '{query}', {user_name}."
+            self._search_result = lambda snippet: f"Pesquisa concluída, {user_name}. {snippet}"
+            self._error_reply = f"Peço desculpas, {user_name}, mas estou enfrentando dificuldades com meus sistemas de processamento avançado."
+            self._farewell = f"Sistemas AIDEN desligando. Até a próxima, {user_name}."
+            note = ("\n\nNota: Recursos avançados de IA requerem configuração adequada. "
+                    "Atualmente operando em modo de diagnóstico aprimorado.") if not CONVERSATIONAL_AI_AVAILABLE else ""
+            self._greeting = (f"Boa tarde, {user_name}. Sistemas AIDEN estão agora online.{note}"
+                              f"\n\nComo posso ajudá-lo hoje, {user_name}?")
+        else:
+            self._reply_prefix = "IA: "
+            self._search_ack = lambda query: f"Claro, vou pesquisar por {query} na web."
+            self._search_result = lambda snippet: f"Encontrei isto: {snippet}"
+            self._error_reply = "Desculpe, não consegui processar sua solicitação no momento."
+            self._farewell = "Até logo!"
+            self._greeting = "Olá! Eu sou a Manus. Como posso ajudar?"
+        
+        # Cheap intents short-circuit the LLM: (pattern, reply builder, reply never changes)
+        if self.enable_aiden_mode:
+            greeting = f"Olá, {user_name}. Como posso ajudá-lo?"
+            thanks = f"Às ordens, {user_name}."
+        else:
+            greeting = "Olá! Como posso ajudar?"
+            thanks = "De nada!"
+        self._direct_intents = (
+            (DIRECT_GREETING_RE, lambda: greeting, True),
+            (DIRECT_THANKS_RE, lambda: thanks, True),
+            (DIRECT_TIME_RE, lambda: datetime.datetime.now().strftime("Agora são %H:%M."), False),
+            (DIRECT_DATE_RE, lambda: datetime.datetime.now().strftime("Hoje é %d/%m/%Y."), False),
+        )
         
         # Initialize AIDEN core if available and enabled
         if self.enable_aiden_mode:
@@ -77,7 +219,11 @@ class ManusAI:
             self.recognizer = sr.Recognizer()
             # Tenta inicializar microfone; se PyAudio não instalado ou dispositivo ausente, faz fallback para modo texto
             try:
-                self.microphone = sr.Microphone()
+                # Silero VAD works on 16 kHz audio
+                self.microphone = sr.Microphone(sample_rate=VAD_SAMPLE_RATE) if VAD_ENABLED else sr.Microphone()
+                # Calibra o ruído ambiente uma vez; o limiar dinâmico acompanha depois
+                self.recognizer.dynamic_energy_threshold = True
+                self._calibrate_microphone()
             except Exception as e:
                 print("[Aviso] Não foi possível inicializar o microfone (PyAudio ausente ou dispositivo indisponível). Fallback para entrada por texto.")
                 print(f"Detalhe: {e}")
@@ -85,30 +231,169 @@ class ManusAI:
         else:
             self.recognizer = None
             self.microphone = None
+        self._failed_listens = 0
+        
+        # Load the local Whisper model now rather than on the first phrase
+        if self.microphone and VOICE_RECOGNITION_AVAILABLE and whisper_stt_enabled():
+            try:
+                load_whisper_model()
+            except Exception as e:
+                print(f"[Aviso] Não foi possível carregar o modelo Whisper: {e}")
             
         # Initialize conversational AI with fallback
         if CONVERSATIONAL_AI_AVAILABLE and gemini_api_key:
             try:
-                self.conversational_ai = ConversationalAI(gemini_api_key)
+                # In AIDEN mode the persona goes into the system instruction once
+                extra = self._AIDEN_INSTRUCTIONS.format(user_name=user_name) if self.enable_aiden_mode else None
+                self.conversational_ai = ConversationalAI(gemini_api_key, extra_instructions=extra)
+                self.conversational_ai.start_keepalive()
             except Exception as e:
                 print(f"[ERROR] Failed to initialize Gemini AI: {e}")
                 self.conversational_ai = None
         else:
             self.conversational_ai = None
+        
+        # Replies to repeated or reworded prompts are served locally (AIDEN_SEM_CACHE=1)
+        self._sem_cache = None
+        if self.conversational_ai and SEMANTIC_CACHE_ENABLED:
+            if SEMANTIC_CACHE_AVAILABLE:
+                try:
+                    self._sem_cache = SemanticCache()
+                except Exception as e:
+                    print(f"[Aviso] Cache semântico indisponível: {e}")
+            else:
+                print("[INFO] AIDEN_SEM_CACHE=1 requer 'pip install sentence-transformers faiss-cpu'")
+        
+        # Firebase writes are queued and sent in batches by the manager's
+        # background thread; fetch the shared manager once instead of every turn
+        self.firebase_manager = None
+        self._last_saved = None  # last (input, reply) pair written, to drop exact repeats
+        if FIREBASE_AVAILABLE:
+            try:
+                self.firebase_manager = get_firebase_manager()
+            except Exception as e:
+                print(f"[Firebase] Não foi possível inicializar: {e}")
+        
+        # TTS runs on a worker thread fed by this queue, so the loop can go back
+        # to listening (or reading input) while the previous answer is spoken
+        self._speech_queue = queue.Queue()
+        self._speech_thread = None
+        self._speaking = threading.Event()
+        self._interrupted = threading.Event()
+        self._interruptions = 0  # bumped on every barge-in so streamed replies know to stop
+        # Normalized command -> reply; mode and user name are fixed per instance
+        self._exact_cache = OrderedDict()
+        self._synth_executor = None  # created on the first long online reply
+        self._prefetch_executor = None  # created on the first follow-up prefetch
+        self._prefetched = None  # future with the answer to FOLLOWUP_PROMPT for the last reply
+        self._prefetch_budget = PREFETCH_BUDGET
+        if TEXT_TO_SPEECH_AVAILABLE:
+            # Start the speech worker now so it warms up the audio output during start-up
+            self._speech_thread = threading.Thread(target=self._speech_loop, daemon=True)
+            self._speech_thread.start()
+        
+        # Microphone capture runs continuously in the background once started;
+        # finished phrases wait here until listen() picks them up
+        self._audio_queue = queue.Queue()
+        self._stop_capture = None
+
+    def _start_capture(self):
+        """Start continuous background capture from the microphone"""
+        if self._stop_capture is None:
+            if VAD_ENABLED:
+                self._stop_capture = self._start_vad_capture()
+            else:
+                self._stop_capture = self.recognizer.listen_in_background(
+                    self.microphone, self._on_audio_captured, phrase_time_limit=10)
+
+    def _start_vad_capture(self):
+        """Background capture that cuts phrases with Silero VAD instead of the energy threshold"""
+        stop = threading.Event()
+
+        def capture_loop():
+            # Keep one audio stream open for the whole capture session instead of
+            # reopening the device for every one-second VAD window
+            while not stop.is_set():
+                try:
+                    with self.microphone as source:
+                        while not stop.is_set():
+                            audio = capture_utterance_vad_from_source(source, timeout=1, phrase_time_limit=10)
+                            if audio is not None:
+                                self._on_audio_captured(self.recognizer, audio)
+                except Exception as e:
+                    print(f"[Aviso] Falha na captura com VAD: {e}")
+                    stop.wait(1)
+
+        thread = threading.Thread(target=capture_loop, name="aiden-vad-capture", daemon=True)
+        thread.start()
+
+        # Same interface as the stopper returned by listen_in_background
+        def stopper(wait_for_stop=True):
+            stop.set()
+            if wait_for_stop:
+                thread.join()
+        return stopper
+
+    def _stop_capture_thread(self):
+        if self._stop_capture is not None:
+            self._stop_capture(wait_for_stop=True)
+            self._stop_capture = None
+
+    def _on_audio_captured(self, recognizer, audio):
+        """Called on the capture thread for every finished phrase"""
+        if self._speaking.is_set():
+            if not BARGE_IN_ENABLED:
+                return  # Most likely our own voice coming back through the mic
+            self.interrupt_speech()
+        self._audio_queue.put(audio)
+
+    def _calibrate_microphone(self):
+        """Measure the ambient noise floor for the recognizer"""
+        with self.microphone as source:
+            self.recognizer.adjust_for_ambient_noise(source, duration=1.0)
+    
+    def _note_listen_result(self, success):
+        """Track consecutive failed listens and recalibrate after a streak"""
+        if success:
+            self._failed_listens = 0
+            return
+        self._failed_listens += 1
+        if self._failed_listens >= RECALIBRATE_AFTER:
+            self._failed_listens = 0
+            # The capture thread holds the microphone; release it while calibrating
+            capturing = self._stop_capture is not None
+            self._stop_capture_thread()
+            try:
+                self._calibrate_microphone()
+            except Exception as e:
+                print(f"[Aviso] Falha ao recalibrar o microfone: {e}")
+            if capturing:
+                self._start_capture()
 
     def listen(self):
         if not self.recognizer or not self.microphone:
             # modo texto
             try:
-                prompt = f"\n{self.user_name}: " if self.enable_aiden_mode else "Digite: "
-                return input(prompt)
+                return input(self._input_prompt)
             except EOFError:
                 return ""
 
-        # Enhanced listening with voice learning
+        if VOICE_RECOGNITION_AVAILABLE and streaming_stt_enabled():
+            return self._listen_streaming()
+        
+        self._start_capture()
         try:
-            from voice_recognition import recognize_speech_from_mic
-            result = recognize_speech_from_mic(self.recognizer, self.microphone, self.user_name, collect_voice_data=True)
+            audio = self._audio_queue.get(timeout=LISTEN_TIMEOUT)
+        except queue.Empty:
+            return ""
+        
+        if not VOICE_RECOGNITION_AVAILABLE:
+            return self._listen_fallback(audio)
+        
+        # Enhanced recognition with voice learning
+        try:
+            result = recognize_audio(self.recognizer, audio, self.user_name, collect_voice_data=True)
+            self._note_listen_result(result["success"])
             
             if result["success"]:
                 transcription = result["transcription"]
@@ -121,21 +406,19 @@ class ManusAI:
                     print(f"Você disse: {transcription}")
                 
                 # Save conversation data to Firebase if available
-                try:
-                    from firebase_integration import get_firebase_manager
-                    firebase_manager = get_firebase_manager()
-                    
-                    # Save the input for learning
-                    voice_data = result.get("voice_data", {})
-                    voice_data.update({
-                        'user_input': transcription,
-                        'confidence': confidence,
-                        'context': 'conversation_input'
-                    })
-                    firebase_manager.save_voice_sample(self.user_name, voice_data)
-                    
-                except Exception as e:
-                    print(f"[Firebase] Não foi possível salvar dados de voz: {e}")
+                if self.firebase_manager:
+                    try:
+                        # Save the input for learning
+                        voice_data = result.get("voice_data", {})
+                        voice_data.update({
+                            'user_input': transcription,
+                            'confidence': confidence,
+                            'context': 'conversation_input'
+                        })
+                        self.firebase_manager.save_voice_sample(self.user_name, voice_data)
+                        
+                    except Exception as e:
+                        print(f"[Firebase] Não foi possível salvar dados de voz: {e}")
                 
                 return transcription
             else:
@@ -143,93 +426,154 @@ class ManusAI:
                 print(f"Erro no reconhecimento de voz: {error_msg}")
                 return ""
                 
-        except ImportError:
-            # Fallback to original implementation
-            return self._listen_fallback()
         except Exception as e:
             print(f"Erro no sistema de voz melhorado: {e}")
-            return self._listen_fallback()
+            return self._listen_fallback(audio)
     
-    def _listen_fallback(self):
+    def _listen_streaming(self):
+        """Listen through the Cloud Speech streaming backend, showing interim text"""
+        # Streaming sends everything the mic hears, so don't start while AIDEN is talking
+        self.wait_until_spoken()
+        
+        def show_interim(text):
+            sys.stdout.write(f"\r… {text}")
+            sys.stdout.flush()
+        
+        result = stream_recognize_from_mic(self.microphone, timeout=LISTEN_TIMEOUT, on_interim=show_interim)
+        self._note_listen_result(result["success"])
+        if result["success"]:
+            print(f"\rVocê disse: {result['transcription']}")
+            return result["transcription"]
+        print(f"\rErro no reconhecimento de voz: {result.get('error', 'Erro desconhecido')}")
+        return ""
+    
+    def _listen_fallback(self, audio):
         """Fallback method for voice recognition"""
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source)
-            print("🎤 Ouvindo...")
-            try:
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                text = self.recognizer.recognize_google(audio, language='pt-BR')
-                print(f"Você disse: {text}")
-                return text
-            except sr.UnknownValueError:
-                print("Não entendi o que você disse.")
-                return ""
-            except sr.RequestError as e:
-                print(f"Erro no serviço de reconhecimento de fala: {e}")
-                return ""
-            except Exception as e:
-                print(f"Erro ao ouvir: {e}")
-                return ""
+        try:
+            text = self.recognizer.recognize_google(audio, language='pt-BR')
+            print(f"Você disse: {text}")
+            self._note_listen_result(True)
+            return text
+        except sr.UnknownValueError:
+            print("Não entendi o que você disse.")
+            self._note_listen_result(False)
+            return ""
+        except sr.RequestError as e:
+            print(f"Erro no serviço de reconhecimento de fala: {e}")
+            return ""
+        except Exception as e:
+            print(f"Erro ao ouvir: {e}")
+            return ""
 
     def speak(self, text, method='online'):
-        # Enhanced AIDEN-style output
-        if self.enable_aiden_mode:
-            print(f"🤖 AIDEN: {text}")
-        else:
-            print(f"IA: {text}")
-            
-        # Attempt text-to-speech if available
+        print(self._reply_prefix + text)
+        self._queue_speech(text, method)
+    
+    def _queue_speech(self, text, method='online'):
+        """Hand text to the speech worker (no-op without text-to-speech)"""
         if TEXT_TO_SPEECH_AVAILABLE:
+            if self._speech_thread is None:
+                self._speech_thread = threading.Thread(target=self._speech_loop, daemon=True)
+                self._speech_thread.start()
+            self._speech_queue.put((text, method))
+    
+    def _stream_and_speak(self, chunks, ensure_tone=False):
+        """
+        Print and speak a streamed reply sentence by sentence
+        
+        Each sentence is queued for TTS as soon as it is complete, so audio
+        starts while Gemini is still generating the rest.
+        
+        Args:
+            chunks: Iterable of text fragments
+            ensure_tone: Open with an AIDEN-style address if the reply doesn't
+        
+        Returns:
+            The full reply text
+        """
+        sys.stdout.write(self._reply_prefix)
+        sentences = []
+        interruptions = self._interruptions
+        try:
+            for sentence in iter_sentences(chunks):
+                if self._interruptions != interruptions:
+                    break  # The user talked over us; don't queue the rest of the reply
+                if not sentences and ensure_tone and not self._tone_re.search(sentence):
+                    sentence = f"Certamente, {self.user_name}. " + sentence
+                sys.stdout.write(sentence + " ")
+                sys.stdout.flush()
+                self._queue_speech(sentence)
+                sentences.append(sentence)
+        finally:
+            # Closing a half-read Gemini stream lets it clean up the chat history
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+        sys.stdout.write("\n")
+        return " ".join(sentences)
+    
+    def _speech_loop(self):
+        """Speak queued texts one after another (runs on the speech worker thread)"""
+        warm_up('online', self.user_name)  # audio output is ready before the first reply
+        while True:
+            text, method = self._speech_queue.get()
+            self._interrupted.clear()
+            self._speaking.set()
             try:
-                # Handle long texts by chunking them
-                if len(text) > 500:  # If text is longer than 500 characters
-                    self._speak_long_text(text, method)
-                else:
-                    speak_text(text, method, self.user_name)
-            except Exception as e:
-                print(f"[TTS Error]: {e}")
+                self._speak_now(text, method)
+            finally:
+                if self._speech_queue.empty():
+                    self._speaking.clear()
+                self._speech_queue.task_done()
+    
+    def _speak_now(self, text, method='online'):
+        """Synthesize and play text, blocking until done"""
+        try:
+            # Handle long texts by chunking them
+            if len(text) > 500:  # If text is longer than 500 characters
+                self._speak_long_text(text, method)
+            else:
+                speak_text(text, method, self.user_name)
+        except Exception as e:
+            print(f"[TTS Error]: {e}")
+    
+    def wait_until_spoken(self):
+        """Block until everything passed to speak() has been played"""
+        if self._speech_thread is not None:
+            self._speech_queue.join()
+    
+    def interrupt_speech(self):
+        """Barge-in: drop pending speech and cut off the current utterance"""
+        while True:
+            try:
+                self._speech_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._speech_queue.task_done()
+        self._interruptions += 1
+        self._interrupted.set()
+        if TEXT_TO_SPEECH_AVAILABLE:
+            stop_speaking()
     
     def _speak_long_text(self, text, method='online'):
         """Handle long text by breaking it into smaller chunks for better TTS performance"""
         try:
-            # Split text into sentences for more natural pauses
-            import re
-            sentences = re.split(r'[.!?]+', text)
-            
-            # Group sentences into chunks of reasonable length
-            chunks = []
-            current_chunk = ""
-            
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if not sentence:
-                    continue
-                    
-                # If adding this sentence would make chunk too long, start new chunk
-                if len(current_chunk + sentence) > 400:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                        current_chunk = sentence
-                    else:
-                        # Single sentence is very long, keep it as is
-                        chunks.append(sentence)
-                        current_chunk = ""
-                else:
-                    current_chunk += (". " if current_chunk else "") + sentence
-            
-            # Add the last chunk if it exists
-            if current_chunk:
-                chunks.append(current_chunk.strip())
+            chunks = split_for_speech(text)
+            if method == 'online':
+                self._speak_chunks_prefetched(chunks)
+                return
             
             # Speak each chunk with a small pause between them
             for i, chunk in enumerate(chunks):
-                if chunk:
+                if self._interrupted.is_set():
+                    break
+                if DEBUG_MODE:
                     print(f"[TTS] Chunk {i+1}/{len(chunks)}: {chunk[:50]}...")
-                    speak_text(chunk, method, self.user_name)
-                    
-                    # Small pause between chunks (except for the last one)
-                    if i < len(chunks) - 1:
-                        import time
-                        time.sleep(0.5)
+                speak_text(chunk, method, self.user_name)
+                
+                # Small pause between chunks (except for the last one); a barge-in ends it early
+                if i < len(chunks) - 1 and self._interrupted.wait(0.5):
+                    break
                         
         except Exception as e:
             print(f"[TTS Long Text Error]: {e}")
@@ -239,41 +583,81 @@ class ManusAI:
             except:
                 print("[TTS] Failed to speak long text, text output only")
 
+    def _speak_chunks_prefetched(self, chunks):
+        """Play online TTS chunks while the following ones are already being synthesized"""
+        if self._synth_executor is None:
+            self._synth_executor = ThreadPoolExecutor(max_workers=SYNTH_AHEAD)
+        
+        # Up to SYNTH_AHEAD chunks are synthesized concurrently; playback stays in order
+        pending = deque(self._synth_executor.submit(synthesize_online, chunk, self.user_name)
+                        for chunk in chunks[:SYNTH_AHEAD])
+        try:
+            for i in range(len(chunks)):
+                filename = pending.popleft().result()
+                if i + SYNTH_AHEAD < len(chunks):
+                    pending.append(self._synth_executor.submit(synthesize_online, chunks[i + SYNTH_AHEAD], self.user_name))
+                
+                if self._interrupted.is_set():
+                    if filename:
+                        discard_synthesized(filename)
+                    break
+                if DEBUG_MODE:
+                    print(f"[TTS] Chunk {i+1}/{len(chunks)}: {chunks[i][:50]}...")
+                if filename:
+                    play_synthesized(filename, self.user_name)
+                
+                # Small pause between chunks (except for the last one); a barge-in ends it early
+                if i < len(chunks) - 1 and self._interrupted.wait(0.5):
+                    break
+        finally:
+            # Chunks synthesized after a barge-in are never played
+            def discard_unplayed(future):
+                if not future.exception() and future.result():
+                    discard_synthesized(future.result())
+            for future in pending:
+                future.add_done_callback(discard_unplayed)
+
     def process_command(self, command):
+        # A prefetched follow-up only answers the command right after its reply
+        prefetched, self._prefetched = self._prefetched, None
+        
+        # Lowercased, whitespace-collapsed form, built once: cache key and search query source
+        normalized = " ".join(command.lower().split())
+        
+        # Only deterministic replies are ever stored, so a hit skips all dispatch
+        cache_key = normalized
+        response = self._exact_cache.get(cache_key)
+        if response is not None:
+            self._exact_cache.move_to_end(cache_key)
+            self.speak(response)
+            self._save_conversation_to_firebase(command, response)
+            return
+        
         # Enhanced AIDEN processing
         if self.enable_aiden_mode and self.aiden_core:
             # Check if this is an AIDEN system command
-            aiden_keywords = [
-                "status", "diagnóstico", "diagnostics", "sistema", "system",
-                "arquivo", "file", "diretório", "directory", "pasta", "folder",
-                "tempo", "time", "data", "date", "processo", "process",
-                "memória", "memory", "performance", "desempenho", "informação", "information"
-            ]
-            
-            if any(keyword in command.lower() for keyword in aiden_keywords):
+            if AIDEN_KEYWORDS_RE.search(command):
                 response = self.aiden_core.process_command(command)
                 self.speak(response)
                 self._save_conversation_to_firebase(command, response)
+                if self.aiden_core.last_response_static:
+                    self._remember_reply(cache_key, response)
                 return
         
         # Web search logic (enhanced for AIDEN)
-        if "pesquisar" in command.lower() or "procurar" in command.lower():
-            query = command.lower().replace("pesquisar", "").replace("procurar", "").strip()
+        if SEARCH_TRIGGER_RE.search(command):
+            query = " ".join(SEARCH_TRIGGER_RE.sub(" ", normalized).split())
             
-            if self.enable_aiden_mode:
-                self.speak(f"Iniciando pesquisa para '{query}', {self.user_name}.")
-            else:
-                self.speak(f"Claro, vou pesquisar por {query} na web.")
+            self.speak(self._search_ack(query))
             
             # Web scraping if available
-            if WEB_SCRAPER_AVAILABLE:
+            web_scraper = _load_web_scraper()
+            if web_scraper:
                 try:
-                    search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-                    soup = scrape_static_page(search_url)
-                    if soup:
-                        snippet = soup.find("div", class_="BNeawe s3v9rd AP7Wnd")
-                        if snippet:
-                            response = f"Pesquisa concluída, {self.user_name}. {snippet.get_text()}" if self.enable_aiden_mode else f"Encontrei isto: {snippet.get_text()}"
+                    snippets = web_scraper.search_snippets(query, limit=1)
+                    if snippets is not None:
+                        if snippets:
+                            response = self._search_result(snippets[0])
                             self.speak(response)
                             self._save_conversation_to_firebase(command, response)
                         else:
@@ -294,58 +678,111 @@ class ManusAI:
                 self._save_conversation_to_firebase(command, response)
             return
 
+        # Greetings, thanks and plain time/date questions don't need the LLM
+        stripped = command.strip()
+        for pattern, reply, static in self._direct_intents:
+            if pattern.match(stripped):
+                response = reply()
+                self.speak(response)
+                self._save_conversation_to_firebase(command, response)
+                if static:
+                    self._remember_reply(cache_key, response)
+                return
+        
         # Conversational AI processing
         if self.conversational_ai:
             try:
-                # Enhanced prompt for AIDEN mode
-                if self.enable_aiden_mode:
-                    enhanced_command = f"""Você é AIDEN (Advanced Interactive Digital Enhancement Network), um assistente de IA inteligente. 
-Responda de forma útil, profissional e amigável. 
-Dirija-se ao usuário como '{self.user_name}' e forneça respostas detalhadas quando apropriado.
-Seja conversacional, mas informativo, como um assistente digital sofisticado.
-
-Consulta do usuário: {command}"""
-                    response = self.conversational_ai.send_message(enhanced_command)
-                    
-                    # Ensure AIDEN tone in response
-                    if not any(term in response.lower() for term in [self.user_name.lower(), 'usuário']):
-                        response = f"Certamente, {self.user_name}. " + response
-                else:
-                    response = self.conversational_ai.send_message(command)
-                    
-                self.speak(response)
+                # A generic "tell me more" is answered from the prefetch started during the last reply
+                if prefetched is not None and FOLLOWUP_RE.match(command):
+                    response = self._prefetched_reply(prefetched)
+                    if response:
+                        self.conversational_ai.adopt_exchange(command, response)
+                        self.speak(response)
+                        self._save_conversation_to_firebase(command, response)
+                        self._start_prefetch()
+                        return
+                
+                # Date/time answers go stale, so those questions always reach Gemini
+                embedding = None
+                if self._sem_cache and not is_time_question(command):
+                    embedding = self._sem_cache.embed(command)
+                    response = self._sem_cache.lookup(embedding)
+                    if response is not None:
+                        self.speak(response)
+                        self._save_conversation_to_firebase(command, response)
+                        return
+                
+                # The AIDEN persona is already in the model's system instruction
+                chunks = self.conversational_ai.send_message_stream(command)
+                
+                # Speak sentences as they arrive (AIDEN tone is checked on the opening sentence)
+                interruptions = self._interruptions
+                response = self._stream_and_speak(chunks, ensure_tone=self.enable_aiden_mode)
                 self._save_conversation_to_firebase(command, response)
+                # Only complete Gemini replies are reused (not fallbacks or cut-off answers)
+                if (embedding is not None and response and self.conversational_ai.last_stream_ok
+                        and self._interruptions == interruptions):
+                    self._sem_cache.add(embedding, command, response)
+                if self.conversational_ai.last_stream_ok:
+                    self._start_prefetch()
                 
             except Exception as e:
-                if self.enable_aiden_mode:
-                    response = f"Peço desculpas, {self.user_name}, mas estou enfrentando dificuldades com meus sistemas de processamento avançado."
-                else:
-                    response = "Desculpe, não consegui processar sua solicitação no momento."
+                response = self._error_reply
                 self.speak(response)
                 self._save_conversation_to_firebase(command, response)
         else:
             # Fallback responses
             response = self._fallback_response(command)
             self._save_conversation_to_firebase(command, response)
+            self._remember_reply(cache_key, response)
+    
+    def _prefetched_reply(self, prefetched):
+        """Answer from a follow-up prefetch, or None if it isn't ready soon or failed"""
+        try:
+            return prefetched.result(timeout=PREFETCH_WAIT)
+        except FutureTimeoutError:
+            if DEBUG_MODE:
+                print("[Gemini] Pré-busca ainda em andamento; enviando a pergunta normalmente")
+        except Exception as e:
+            print(f"[Aviso] Pré-busca do Gemini falhou: {e}")
+        return None
+    
+    def _start_prefetch(self):
+        """Generate the answer to FOLLOWUP_PROMPT in the background while the reply plays"""
+        if not PREFETCH_ENABLED or self._prefetch_budget <= 0:
+            return
+        self._prefetch_budget -= 1
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1)
+        self._prefetched = self._prefetch_executor.submit(self.conversational_ai.generate_followup, FOLLOWUP_PROMPT)
+    
+    def _remember_reply(self, key, response):
+        """Store a deterministic reply in the bounded LRU exact-match cache"""
+        self._exact_cache[key] = response
+        self._exact_cache.move_to_end(key)
+        if len(self._exact_cache) > EXACT_CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
     
     def _save_conversation_to_firebase(self, user_input: str, ai_response: str):
         """Save conversation data to Firebase for learning and analysis"""
+        if not self.firebase_manager:
+            return
+        # Skip low-value rows: near-empty inputs and an exact repeat of the last exchange
+        if len(user_input.strip()) < MIN_SAVED_INPUT_LENGTH or (user_input, ai_response) == self._last_saved:
+            return
+        self._last_saved = (user_input, ai_response)
         try:
-            from firebase_integration import get_firebase_manager
-            firebase_manager = get_firebase_manager()
-            firebase_manager.save_conversation(user_input, ai_response)
+            self.firebase_manager.save_conversation(user_input, ai_response)
         except Exception as e:
             # Silently fail - don't interrupt user experience
             pass
     
     def _fallback_response(self, command):
         """Provide intelligent fallback responses when AI is unavailable"""
-        command_lower = command.lower()
-        
         if self.enable_aiden_mode:
-            if any(word in command_lower for word in ["olá", "oi", "hello", "hi"]):
+            if FALLBACK_GREETING_RE.search(command):
                 response = f"Olá, {self.user_name}. Estou operando com capacidades limitadas, mas permaneço ao seu serviço."
-            elif "?" in command or any(word in command_lower for word in ["como", "what", "why", "quando"]):
+            elif FALLBACK_QUESTION_RE.search(command):
                 response = f"Essa é uma pergunta intrigante, {self.user_name}. Embora meus sistemas avançados estejam offline, posso ajudar com diagnósticos e operações do sistema."
             else:
                 response = f"Reconheço sua solicitação, {self.user_name}. Minhas capacidades atuais incluem monitoramento do sistema e gerenciamento de arquivos. Como posso ajudá-lo?"
@@ -356,28 +793,28 @@ Consulta do usuário: {command}"""
         return response
 
     def run(self):
-        # Enhanced greeting for AIDEN mode
-        if self.enable_aiden_mode:
-            greeting = f"Boa tarde, {self.user_name}. Sistemas AIDEN estão agora online."
-            if not CONVERSATIONAL_AI_AVAILABLE:
-                greeting += f"\n\nNota: Recursos avançados de IA requerem configuração adequada. Atualmente operando em modo de diagnóstico aprimorado."
-            greeting += f"\n\nComo posso ajudá-lo hoje, {self.user_name}?"
-        else:
-            greeting = "Olá! Eu sou a Manus. Como posso ajudar?"
-            
-        self.speak(greeting)
+        self.speak(self._greeting)
         
         while True:
             command = self.listen()
-            if command:
-                if command.lower() in ["parar", "sair", "exit", "quit"]:
-                    if self.enable_aiden_mode:
-                        farewell = f"Sistemas AIDEN desligando. Até a próxima, {self.user_name}."
-                    else:
-                        farewell = "Até logo!"
-                    self.speak(farewell)
-                    break
-                self.process_command(command)
+            if not command or command.isspace():
+                continue  # Silence/timeout: nothing to process
+            command = command.strip()
+            # Only short inputs can be exit words; skip the lowercase copy for the rest
+            if len(command) <= EXIT_COMMAND_MAX_LENGTH and command.lower() in EXIT_COMMANDS:
+                self.speak(self._farewell)
+                break
+            self.process_command(command)
+        
+        # Let the farewell finish before releasing the microphone and exiting
+        self.wait_until_spoken()
+        self._stop_capture_thread()
+        if self.firebase_manager:
+            self.firebase_manager.flush_now()
+        if self._sem_cache:
+            self._sem_cache.save()
+        if self.conversational_ai:
+            self.conversational_ai.stop_keepalive()
 
 if __name__ == "__main__":
     gemini_api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
@@ -0,0 +1,97 @@
+"""
+Semantic response cache for AIDEN
+
+Replies from Gemini are stored alongside a sentence embedding of the prompt,
+so a repeated or reworded question is answered locally instead of waiting
+for another LLM round-trip. Enabled with AIDEN_SEM_CACHE=1; needs
+sentence-transformers and faiss-cpu (pip install sentence-transformers faiss-cpu).
+"""
+
+import os
+import pickle
+import importlib.util
+import threading
+from typing import List, Optional, Tuple
+
+# Both libraries are heavy to import, so they are only loaded when the cache is built
+SEMANTIC_CACHE_AVAILABLE = (importlib.util.find_spec("sentence_transformers") is not None
+                            and importlib.util.find_spec("faiss") is not None)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("AIDEN_SEM_CACHE", "0") == "1"
+SEMANTIC_CACHE_MODEL = os.getenv("AIDEN_SEM_CACHE_MODEL", "all-MiniLM-L6-v2")
+SEMANTIC_CACHE_PATH = os.getenv("AIDEN_SEM_CACHE_PATH", "aiden_semantic_cache")
+
+# Cosine similarity at or above which a stored reply is reused
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("AIDEN_SEM_CACHE_THRESHOLD", "0.9"))
+
+class SemanticCache:
+    def __init__(self, path: str = SEMANTIC_CACHE_PATH, model_name: str = SEMANTIC_CACHE_MODEL,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        """
+        Args:
+            path: File prefix for the saved index (.faiss) and entries (.pkl)
+            model_name: sentence-transformers model used to embed prompts
+            threshold: Minimum cosine similarity for a hit
+        """
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        self._faiss = faiss
+        self.model = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self._index_path = path + ".faiss"
+        self._entries_path = path + ".pkl"
+        self._lock = threading.Lock()
+
+        # (prompt, response) pairs; position i matches vector i in the index
+        self.entries: List[Tuple[str, str]] = []
+        self.index = None
+        if os.path.exists(self._index_path) and os.path.exists(self._entries_path):
+            try:
+                self.index = faiss.read_index(self._index_path)
+                with open(self._entries_path, "rb") as f:
+                    self.entries = pickle.load(f)
+                print(f"[INFO] Semantic cache loaded ({len(self.entries)} respostas)")
+            except Exception as e:
+                print(f"[Aviso] Cache semântico corrompido, recomeçando: {e}")
+                self.index = None
+                self.entries = []
+        if self.index is None or self.index.ntotal != len(self.entries):
+            # Normalized embeddings, so inner product is cosine similarity
+            self.index = faiss.IndexFlatIP(self.model.get_sentence_embedding_dimension())
+            self.entries = []
+        self._dirty = False
+
+    def embed(self, prompt: str):
+        """Normalized embedding of a prompt, shaped (1, dim) for the index"""
+        return self.model.encode([" ".join(prompt.lower().split())], normalize_embeddings=True)
+
+    def lookup(self, embedding) -> Optional[str]:
+        """Cached reply for the closest stored prompt, or None below the threshold"""
+        with self._lock:
+            if not self.entries:
+                return None
+            scores, ids = self.index.search(embedding, 1)
+            if ids[0][0] < 0 or scores[0][0] < self.threshold:
+                return None
+            return self.entries[ids[0][0]][1]
+
+    def add(self, embedding, prompt: str, response: str):
+        """Store a reply under the prompt's embedding"""
+        with self._lock:
+            self.index.add(embedding)
+            self.entries.append((prompt, response))
+            self._dirty = True
+
+    def save(self):
+        """Write the index and entries to disk if anything was added"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self._faiss.write_index(self.index, self._index_path)
+                with open(self._entries_path, "wb") as f:
+                    pickle.dump(self.entries, f)
+                self._dirty = False
+            except Exception as e:
+                print(f"[Aviso] Não foi possível salvar o cache semântico: {e}")
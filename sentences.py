@@ -0,0 +1,80 @@
+"""
+Sentence splitting for AIDEN's spoken replies
+
+Pure text helpers with no optional dependencies, so they load (and can be
+tested) even when the Gemini or TTS libraries are missing.
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List
+
+# Sentence end: terminal punctuation followed by whitespace (so "3.5" never splits),
+# or a line break, which ends list items and headings that carry no punctuation
+_SENTENCE_END_RE = re.compile(r"[.!?]+(?=\s)|\n+")
+
+# Long texts are spoken in chunks of about this many characters
+SPEECH_CHUNK_LENGTH = 400
+
+# A period after these words does not end the sentence
+_ABBREVIATIONS = frozenset({"dr.", "dra.", "sr.", "sra.", "srta.", "prof.", "profa.", "etc.", "ex.", "p.ex.", "vs."})
+
+def iter_sentences(chunks: Iterable[str], min_length: int = 10) -> Iterator[str]:
+    """Regroup streamed text chunks into complete sentences as soon as they end.
+
+    Fragments shorter than min_length are merged into the following sentence
+    so TTS isn't fed tiny utterances. Whatever remains at the end is yielded last.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(buffer):
+            candidate = buffer[start:match.end()].strip()
+            if len(candidate) < min_length or candidate.rsplit(None, 1)[-1].lower() in _ABBREVIATIONS:
+                continue
+            yield candidate
+            start = match.end()
+        buffer = buffer[start:]
+    
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+def _next_sentence_end(text: str, start: int, marks: Dict[str, int]) -> int:
+    """Index just past the next '. ', '! ' or '? ' at or after start (len(text) if none)"""
+    end = len(text)
+    for mark in marks:
+        # Reuse the last find() result while it is still ahead of start
+        if marks[mark] < start:
+            found = text.find(mark, start)
+            marks[mark] = found if found != -1 else len(text)
+        end = min(end, marks[mark] + 1)
+    return min(end, len(text))
+
+def split_for_speech(text: str, max_length: int = SPEECH_CHUNK_LENGTH) -> List[str]:
+    """Group the sentences of text into chunks of at most max_length characters (single pass)"""
+    chunks = []
+    current = []
+    current_length = 0
+    marks = {". ": -1, "! ": -1, "? ": -1}
+    
+    i = 0
+    while i < len(text):
+        j = _next_sentence_end(text, i, marks)
+        sentence = text[i:j].strip()
+        i = j
+        if not sentence:
+            continue
+        
+        # If adding this sentence would make the chunk too long, start a new one;
+        # a single very long sentence becomes a chunk of its own
+        if current and current_length + len(sentence) > max_length:
+            chunks.append(" ".join(current))
+            current = []
+            current_length = 0
+        current.append(sentence)
+        current_length += len(sentence) + 1
+    
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -5,6 +5,7 @@ Test script to demonstrate Firebase fix and local fallback functionality
 
 import sys
 import os
+import datetime
 from firebase_integration import get_firebase_manager
 
 def test_firebase_connection():
@@ -100,6 +101,72 @@ def test_firebase_connection():
     
     return True
 
+class _UnreachableDB:
+    """Database reference whose writes always fail, like a dropped connection"""
+    def update(self, values):
+        raise ConnectionError("Firebase unreachable")
+
+def test_batch_write_fallback():
+    """A failed batch write must save every queued record to the local file"""
+    import tempfile
+    from firebase_integration import FirebaseManager, _read_json_file
+    
+    print("\n🧪 Testing batch write fallback...")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            fm = FirebaseManager({})
+            fm.db = _UnreachableDB()
+            fm._write_batch([
+                ("searches/k1", {'query': 'clima hoje'}, lambda: fm._save_locally("clima hoje", "Ensolarado", "web")),
+                ("searches/k2", {'query': 'dólar hoje'}, lambda: fm._save_locally("dólar hoje", "R$ 5,00", "web")),
+            ])
+            
+            filename = f"aiden_searches_{datetime.datetime.now().strftime('%Y%m%d')}.json"
+            saved = _read_json_file(filename)
+            assert [item['query'] for item in saved] == ["clima hoje", "dólar hoje"], saved
+        finally:
+            os.chdir(cwd)
+    
+    print("   ✅ Failed batch saved locally")
+
+def test_recent_search_merge():
+    """Recent searches come first, by relevance then recency, merged with local ones"""
+    import tempfile
+    from firebase_integration import FirebaseManager
+    
+    print("\n🧪 Testing recent search merge and ordering...")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            fm = FirebaseManager({})
+            fm._init_pending = False  # Stay offline so only memory and local files are searched
+            
+            fm._remember_search("clima em são paulo", "Ensolarado", "web", "k1")
+            fm._remember_search("clima no rio", "Chuva", "web", "k2")
+            fm._remember_search("clima em são paulo hoje", "Nublado", "web", "k3")
+            
+            # Highest word overlap first; ties go to the newest search
+            query_words = frozenset("clima em são paulo".split())
+            assert [m['id'] for m in fm._search_recent(query_words, 5)] == ["k3", "k1", "k2"]
+            assert [m['id'] for m in fm._search_recent(query_words, 2)] == ["k3", "k1"]
+            assert fm._search_recent(frozenset({"futebol"}), 5) == []
+            
+            # Local results fill the remaining slots, skipping ones already found in memory
+            fm._save_locally("clima em são paulo", "Ensolarado", "web")
+            fm._save_locally("clima em são paulo amanhã", "Frio", "web")
+            results = fm.search_previous_results("clima em são paulo", 5)
+            assert [r['result'] for r in results] == ["Nublado", "Ensolarado", "Chuva", "Frio"], results
+        finally:
+            os.chdir(cwd)
+    
+    print("   ✅ Recent and local searches merged in order")
+
 if __name__ == "__main__":
     success = test_firebase_connection()
+    # These two assert instead of returning a result
+    test_batch_write_fallback()
+    test_recent_search_merge()
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -3,9 +3,40 @@ from gtts import gTTS
 import os
 import pygame
 import tempfile
+import threading
 from typing import Optional, Dict, Any
 import json
 
+from sentences import SPEECH_CHUNK_LENGTH, split_for_speech  # re-exported for the voice front ends
+
+# Routine per-utterance status lines are only printed with DEBUG_MODE=true (errors always are)
+DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
+
+# Set by stop_speaking() to cut the current utterance short (barge-in)
+_stop_event = threading.Event()
+_active_engine = None
+
+# pyttsx3 engine reused across utterances: init loads the platform driver and
+# configuring it walks the voice list, so both happen once (or when settings change)
+_offline_engine = None
+_offline_engine_settings = None
+_engine_lock = threading.Lock()
+
+def stop_speaking() -> None:
+    """Interrupt whatever is being spoken right now (safe to call from any thread)."""
+    _stop_event.set()
+    engine = _active_engine
+    if engine is not None:
+        try:
+            engine.stop()
+        except Exception:
+            pass
+    try:
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+    except Exception:
+        pass
+
 def get_voice_settings(user_id: str = "default") -> Dict[str, Any]:
     """Get voice settings for a specific user"""
     try:
@@ -57,30 +88,64 @@ def configure_voice_engine(engine, settings: Dict[str, Any]) -> bool:
             
             if male_voice:
                 engine.setProperty('voice', male_voice.id)
-                print(f"[TTS] Using male voice: {male_voice.name}")
+                if DEBUG_MODE:
+                    print(f"[TTS] Using male voice: {male_voice.name}")
             else:
                 # Fallback to first available voice
                 if len(voices) > 1:
                     engine.setProperty('voice', voices[1].id)  # Often the second voice is different
-                print("[TTS] Male voice not found, using available voice")
+                if DEBUG_MODE:
+                    print("[TTS] Male voice not found, using available voice")
         
         return True
     except Exception as e:
         print(f"[TTS] Error configuring voice: {e}")
         return False
 
+def get_engine(user_id: str = "default", settings: Optional[Dict[str, Any]] = None):
+    """Shared pyttsx3 engine configured with the user's voice settings (created on first use)."""
+    global _offline_engine, _offline_engine_settings
+    if settings is None:
+        settings = get_voice_settings(user_id)
+    with _engine_lock:
+        if _offline_engine is None:
+            _offline_engine = pyttsx3.init()
+            _offline_engine_settings = None
+        if settings != _offline_engine_settings:
+            configure_voice_engine(_offline_engine, settings)
+            _offline_engine_settings = dict(settings)
+        return _offline_engine
+
+def warm_up(method: str = 'offline', user_id: str = "default") -> None:
+    """Pay the synthesis backend's start-up cost ahead of the first utterance.
+
+    Call it from the thread that will do the speaking (some pyttsx3 drivers
+    are bound to the thread that created the engine).
+    """
+    try:
+        if method == 'offline':
+            get_engine(user_id)
+        else:
+            pygame.mixer.init()
+    except Exception as e:
+        print(f"[TTS] Warm-up failed: {e}")
+
 def speak_offline(text: str, user_id: str = "default") -> bool:
     """Convert text to speech using pyttsx3 (offline) with improved male voice."""
+    global _active_engine, _offline_engine
     try:
-        engine = pyttsx3.init()
         settings = get_voice_settings(user_id)
         
-        # Configure the voice with user preferences
-        configure_voice_engine(engine, settings)
+        # Reuse the shared engine, configured with user preferences
+        engine = get_engine(user_id, settings)
         
-        # Speak the text
+        # Speak the text (the engine is exposed so stop_speaking() can cut it off)
         engine.say(text)
-        engine.runAndWait()
+        _active_engine = engine
+        try:
+            engine.runAndWait()
+        finally:
+            _active_engine = None
         
         # Save voice usage data for learning
         save_voice_usage(user_id, text, 'offline', settings)
@@ -88,6 +153,7 @@ def speak_offline(text: str, user_id: str = "default") -> bool:
         return True
     except Exception as e:
         print(f"Erro ao usar pyttsx3: {e}")
+        _offline_engine = None  # Start from a fresh engine next time
         return False
 
 def speak_online(text: str, user_id: str = "default", lang: str = 'pt-br', filename: Optional[str] = None) -> bool:
@@ -122,6 +188,9 @@ def play_audio_file(filename: str, volume: float = 0.9) -> bool:
         pygame.mixer.music.load(filename)
         pygame.mixer.music.play()
         while pygame.mixer.music.get_busy():
+            if _stop_event.is_set():
+                pygame.mixer.music.stop()
+                break
             pygame.time.wait(100)
         return True
     except Exception as e:
@@ -138,25 +207,14 @@ def speak_text(text: str, method: str = 'offline', user_id: str = "default") ->
         
         # Clean and prepare text for better synthesis
         text = _clean_text_for_tts(text)
+        _stop_event.clear()
         
         if method == 'offline':
             result = speak_offline(text, user_id)
         elif method == 'online':
-            # Create temporary file for online TTS
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            filename = temp_file.name
-            temp_file.close()
-            
-            if speak_online(text, user_id, filename=filename):
-                settings = get_voice_settings(user_id)
-                volume = settings.get('volume', 0.9)
-                result = play_audio_file(filename, volume)
-                # Clean up temporary file
-                try:
-                    os.remove(filename)
-                except:
-                    pass
-                return result
+            filename = _synthesize_to_file(text, user_id)
+            if filename:
+                return play_synthesized(filename, user_id)
             return False
         else:
             print(f"[TTS] Invalid method '{method}'. Use 'offline' or 'online'.")
@@ -178,6 +236,43 @@ def speak_text(text: str, method: str = 'offline', user_id: str = "default") ->
             print("[TTS] All speech synthesis methods failed")
             return False
 
+def _synthesize_to_file(text: str, user_id: str) -> Optional[str]:
+    """Run gTTS on already-cleaned text into a temporary mp3; returns its path or None."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
+    filename = temp_file.name
+    temp_file.close()
+    
+    if speak_online(text, user_id, filename=filename):
+        return filename
+    discard_synthesized(filename)
+    return None
+
+def synthesize_online(text: str, user_id: str = "default") -> Optional[str]:
+    """Synthesize speech with gTTS without playing it (safe to run on a worker thread).
+
+    Lets a caller prepare the next chunk while the current one plays; hand the
+    returned file to play_synthesized() or discard_synthesized().
+    """
+    if not text or not text.strip():
+        return None
+    return _synthesize_to_file(_clean_text_for_tts(text), user_id)
+
+def play_synthesized(filename: str, user_id: str = "default") -> bool:
+    """Play an mp3 from synthesize_online() and delete it afterwards."""
+    _stop_event.clear()
+    settings = get_voice_settings(user_id)
+    try:
+        return play_audio_file(filename, settings.get('volume', 0.9))
+    finally:
+        discard_synthesized(filename)
+
+def discard_synthesized(filename: str) -> None:
+    """Delete a synthesized file that won't be played."""
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
 def _clean_text_for_tts(text: str) -> str:
     """Clean and prepare text for better text-to-speech synthesis"""
     import re
@@ -1,7 +1,163 @@
 import speech_recognition as sr
+import os
 import json
+import time
 import datetime
-from typing import Dict, Any, Optional
+import threading
+import importlib.util
+from collections import deque
+from typing import Dict, Any, Optional, Callable
+
+def _module_available(name: str) -> bool:
+    """Whether a module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:  # Parent package missing
+        return False
+
+# The optional backends below are heavy (torch alone takes seconds), so they are
+# only probed here and imported the first time they are actually used
+
+# Optional Google Cloud Speech for streaming recognition (interim results while speaking)
+CLOUD_SPEECH_AVAILABLE = _module_available("google.cloud.speech")
+
+# Optional Silero VAD: only the speech part of the microphone signal is sent to STT
+SILERO_AVAILABLE = _module_available("torch") and _module_available("silero_vad")
+
+# Optional local Whisper (whisper.cpp bindings) for offline recognition
+WHISPER_AVAILABLE = _module_available("pywhispercpp")
+
+# Silero works on 512-sample frames (32 ms) of 16 kHz audio
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_SAMPLES = 512
+VAD_ENABLED = SILERO_AVAILABLE and os.getenv("AIDEN_VAD", "1") == "1"
+
+# Speech-to-text backend: "google" (free endpoint, whole utterance),
+# "cloud_streaming" (Google Cloud Speech streaming API, needs credentials) or
+# "whisper" (local whisper.cpp model, Google only as fallback)
+STT_BACKEND = os.getenv("AIDEN_STT_BACKEND", "google").lower()
+
+# Quantized multilingual model; the .en models can't transcribe Portuguese
+WHISPER_MODEL = os.getenv("AIDEN_WHISPER_MODEL", "base-q5_1")
+# Whether the Google endpoint may still be tried when Whisper understood nothing
+WHISPER_GOOGLE_FALLBACK = os.getenv("AIDEN_WHISPER_GOOGLE_FALLBACK", "1") == "1"
+
+_speech_client = None
+_whisper_model = None
+_whisper_lock = threading.Lock()
+
+_vad_model = None
+
+class VoiceActivityGate:
+    """Silero VAD state machine for one utterance.
+
+    Waiting -> speech when a frame scores above start_threshold; speech ends
+    after silence_ms of frames scoring below end_threshold.
+    """
+
+    def __init__(self, start_threshold: float = 0.5, end_threshold: float = 0.35, silence_ms: int = 700):
+        global _vad_model
+        import torch
+        if _vad_model is None:
+            from silero_vad import load_silero_vad
+            _vad_model = load_silero_vad()
+        self._torch = torch
+        self.model = _vad_model
+        self.start_threshold = start_threshold
+        self.end_threshold = end_threshold
+        self.silence_frames = int(silence_ms / (1000 * VAD_FRAME_SAMPLES / VAD_SAMPLE_RATE))
+        self.triggered = False
+        self._silent = 0
+
+    def process(self, frame: bytes) -> str:
+        """Classify one 16-bit frame: 'idle', 'start', 'speech' or 'end'"""
+        torch = self._torch
+        samples = torch.frombuffer(bytearray(frame), dtype=torch.int16).float() / 32768.0
+        probability = self.model(samples, VAD_SAMPLE_RATE).item()
+
+        if not self.triggered:
+            if probability > self.start_threshold:
+                self.triggered = True
+                self._silent = 0
+                return "start"
+            return "idle"
+
+        self._silent = self._silent + 1 if probability < self.end_threshold else 0
+        if self._silent >= self.silence_frames:
+            self.triggered = False
+            self.model.reset_states()
+            return "end"
+        return "speech"
+
+def capture_utterance_vad(microphone, timeout: float = 10, phrase_time_limit: float = 10,
+                          pre_roll_ms: int = 300) -> Optional[sr.AudioData]:
+    """Capture one utterance, using Silero VAD to find where speech starts and ends.
+
+    The microphone must run at 16 kHz. Returns None if no speech starts within timeout.
+    """
+    with microphone as source:
+        return capture_utterance_vad_from_source(source, timeout, phrase_time_limit, pre_roll_ms)
+
+def capture_utterance_vad_from_source(source, timeout: float = 10, phrase_time_limit: float = 10,
+                                      pre_roll_ms: int = 300) -> Optional[sr.AudioData]:
+    """Same as capture_utterance_vad, on a microphone that is already open.
+
+    Lets a capture loop keep one audio stream open across utterances.
+    """
+    gate = VoiceActivityGate()
+    frame_seconds = VAD_FRAME_SAMPLES / VAD_SAMPLE_RATE
+    pre_roll = deque(maxlen=max(1, int(pre_roll_ms / 1000 / frame_seconds)))
+    max_frames = int(phrase_time_limit / frame_seconds)
+    frames = []
+
+    deadline = time.monotonic() + timeout
+    while True:
+        frame = source.stream.read(VAD_FRAME_SAMPLES)
+        event = gate.process(frame)
+        if event == "idle":
+            pre_roll.append(frame)
+            if time.monotonic() > deadline:
+                return None
+            continue
+        if event == "start":
+            frames.extend(pre_roll)
+        frames.append(frame)
+        if event == "end" or len(frames) >= max_frames:
+            break
+
+    gate.model.reset_states()
+    return sr.AudioData(b"".join(frames), VAD_SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+def streaming_stt_enabled() -> bool:
+    """Whether listening should go through the Cloud Speech streaming backend"""
+    return STT_BACKEND == "cloud_streaming" and CLOUD_SPEECH_AVAILABLE
+
+def whisper_stt_enabled() -> bool:
+    """Whether recognition should run on the local Whisper model"""
+    return STT_BACKEND == "whisper" and WHISPER_AVAILABLE
+
+def load_whisper_model():
+    """Load the Whisper model once (downloads it on first use); call early to avoid a slow first turn"""
+    global _whisper_model
+    if _whisper_model is None:
+        with _whisper_lock:
+            if _whisper_model is None:
+                from pywhispercpp.model import Model as WhisperModel
+                print(f"[INFO] Carregando modelo Whisper local: {WHISPER_MODEL}")
+                _whisper_model = WhisperModel(WHISPER_MODEL, print_realtime=False, print_progress=False)
+    return _whisper_model
+
+def transcribe_local(audio: sr.AudioData, language: str = "pt") -> Optional[str]:
+    """Transcreve o áudio com o modelo Whisper local; retorna None se nada foi entendido"""
+    import numpy as np
+    model = load_whisper_model()
+    # whisper.cpp expects 16 kHz mono float32 samples
+    raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+    samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    with _whisper_lock:
+        segments = model.transcribe(samples, language=language)
+    text = " ".join(segment.text.strip() for segment in segments).strip()
+    return text or None
 
 def recognize_speech_from_mic(recognizer, microphone, user_id="default", collect_voice_data=True):
     """Transcreve fala de um microfone para texto e coleta dados de voz para aprendizado."""
@@ -18,13 +174,6 @@ def recognize_speech_from_mic(recognizer, microphone, user_id="default", collect
         try:
             # Enhanced listening with longer timeout and better settings
             audio = recognizer.listen(source, timeout=10, phrase_time_limit=10)
-            
-            # Collect voice characteristics for learning
-            if collect_voice_data:
-                voice_characteristics = _analyze_voice_characteristics(audio, recognizer)
-            else:
-                voice_characteristics = {}
-                
         except sr.WaitTimeoutError:
             return {
                 "success": False,
@@ -33,6 +182,20 @@ def recognize_speech_from_mic(recognizer, microphone, user_id="default", collect
                 "voice_data": {}
             }
 
+    return recognize_audio(recognizer, audio, user_id, collect_voice_data)
+
+def recognize_audio(recognizer, audio, user_id="default", collect_voice_data=True):
+    """Transcreve um trecho de áudio já capturado e coleta dados de voz para aprendizado.
+
+    Permite que a captura do microfone aconteça em outra thread (ex.: listen_in_background)
+    enquanto o reconhecimento roda separadamente.
+    """
+    # Collect voice characteristics for learning
+    if collect_voice_data:
+        voice_characteristics = _analyze_voice_characteristics(audio, recognizer)
+    else:
+        voice_characteristics = {}
+
     response = {
         "success": True,
         "error": None,
@@ -46,25 +209,35 @@ def recognize_speech_from_mic(recognizer, microphone, user_id="default", collect
         transcription = None
         confidence = 0.0
         
-        # Primary method: Google Speech Recognition
-        try:
-            transcription = recognizer.recognize_google(audio, language='pt-BR', show_all=True)
-            if isinstance(transcription, dict) and 'alternative' in transcription:
-                alternatives = transcription['alternative']
-                if alternatives:
-                    best_alternative = alternatives[0]
-                    transcription = best_alternative.get('transcript', '')
-                    confidence = best_alternative.get('confidence', 0.0)
-            elif isinstance(transcription, str):
-                confidence = 0.8  # Default confidence for simple string response
-            
-        except sr.UnknownValueError:
-            # Fallback: try with different settings
+        # Local Whisper first when selected
+        use_whisper = whisper_stt_enabled()
+        if use_whisper:
             try:
-                transcription = recognizer.recognize_google(audio, language='pt-BR')
-                confidence = 0.6  # Lower confidence for fallback
-            except:
-                transcription = None
+                transcription = transcribe_local(audio)
+                confidence = 0.8 if transcription else 0.0
+            except Exception as e:
+                print(f"[Aviso] Whisper local falhou, usando Google: {e}")
+        
+        # Google Speech Recognition (primary method, or fallback after Whisper)
+        if not transcription and (not use_whisper or WHISPER_GOOGLE_FALLBACK):
+            try:
+                transcription = recognizer.recognize_google(audio, language='pt-BR', show_all=True)
+                if isinstance(transcription, dict) and 'alternative' in transcription:
+                    alternatives = transcription['alternative']
+                    if alternatives:
+                        best_alternative = alternatives[0]
+                        transcription = best_alternative.get('transcript', '')
+                        confidence = best_alternative.get('confidence', 0.0)
+                elif isinstance(transcription, str):
+                    confidence = 0.8  # Default confidence for simple string response
+            
+            except sr.UnknownValueError:
+                # Fallback: try with different settings
+                try:
+                    transcription = recognizer.recognize_google(audio, language='pt-BR')
+                    confidence = 0.6  # Lower confidence for fallback
+                except:
+                    transcription = None
         
         if transcription:
             response["transcription"] = transcription
@@ -86,6 +259,119 @@ def recognize_speech_from_mic(recognizer, microphone, user_id="default", collect
 
     return response
 
+def stream_recognize_from_mic(microphone, language: str = "pt-BR", timeout: float = 10,
+                              on_interim: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Transcreve uma fala usando o streaming do Google Cloud Speech.
+
+    O áudio é enviado em blocos de 100 ms enquanto o usuário fala e o resultado
+    final chega logo após o fim da fala, em vez de esperar o trecho inteiro.
+
+    Args:
+        microphone: sr.Microphone (16-bit PCM)
+        language: Código de idioma
+        timeout: Segundos máximos de escuta sem resultado final
+        on_interim: Chamado com cada transcrição parcial
+    """
+    global _speech_client
+    from google.cloud import speech as cloud_speech
+    if _speech_client is None:
+        _speech_client = cloud_speech.SpeechClient()
+
+    config = cloud_speech.RecognitionConfig(
+        encoding=cloud_speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=microphone.SAMPLE_RATE,
+        language_code=language,
+    )
+    streaming_config = cloud_speech.StreamingRecognitionConfig(
+        config=config, interim_results=True, single_utterance=True
+    )
+
+    stop = threading.Event()
+    with microphone as source:
+        frames_per_request = max(int(source.SAMPLE_RATE / 10), source.CHUNK)  # ~100 ms
+        deadline = time.monotonic() + timeout
+        use_vad = VAD_ENABLED and source.SAMPLE_RATE == VAD_SAMPLE_RATE
+        read_lock = threading.Lock()
+
+        def read(frames):
+            # Runs on the gRPC request thread; holding the lock lets the caller wait
+            # out a read in progress before the microphone stream is closed
+            with read_lock:
+                return None if stop.is_set() else source.stream.read(frames)
+
+        def audio_requests():
+            while time.monotonic() < deadline:
+                data = read(frames_per_request)
+                if data is None:
+                    return
+                yield cloud_speech.StreamingRecognizeRequest(audio_content=data)
+
+        def gated_audio_requests():
+            # Send nothing until Silero hears speech (plus a short pre-roll), stop after 700 ms of silence
+            gate = VoiceActivityGate()
+            pre_roll = deque(maxlen=10)
+            pending = []
+            while time.monotonic() < deadline:
+                frame = read(VAD_FRAME_SAMPLES)
+                if frame is None:
+                    return
+                event = gate.process(frame)
+                if event == "idle":
+                    pre_roll.append(frame)
+                    continue
+                if event == "start":
+                    pending.extend(pre_roll)
+                pending.append(frame)
+                if event == "end" or len(pending) * VAD_FRAME_SAMPLES >= frames_per_request:
+                    yield cloud_speech.StreamingRecognizeRequest(audio_content=b"".join(pending))
+                    pending = []
+                if event == "end":
+                    return
+
+        print("🎤 Ouvindo... (streaming)")
+        responses = None
+        try:
+            requests = gated_audio_requests() if use_vad else audio_requests()
+            responses = _speech_client.streaming_recognize(config=streaming_config, requests=requests)
+            for response in responses:
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    best = result.alternatives[0]
+                    if result.is_final:
+                        return {
+                            "success": True,
+                            "error": None,
+                            "transcription": best.transcript.strip(),
+                            "confidence": best.confidence,
+                            "voice_data": {}
+                        }
+                    if on_interim:
+                        on_interim(best.transcript)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Erro no serviço de reconhecimento: {e}",
+                "transcription": None,
+                "voice_data": {}
+            }
+        finally:
+            # Stop feeding audio and wait for any read in progress before the
+            # microphone stream is closed
+            stop.set()
+            cancel = getattr(responses, "cancel", None)
+            if cancel is not None:
+                cancel()
+            with read_lock:
+                pass
+
+    return {
+        "success": False,
+        "error": "Timeout - nenhuma fala detectada",
+        "transcription": None,
+        "voice_data": {}
+    }
+
 def _analyze_voice_characteristics(audio, recognizer) -> Dict[str, Any]:
     """Analisa características da voz para aprendizado e adaptação"""
     try:
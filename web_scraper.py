@@ -1,139 +1,248 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import json
+import soupsieve
+import importlib.util
+from urllib.parse import urlencode
+import threading
+import time
 import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, List, Any
 
-def scrape_static_page(url: str, headers: Optional[Dict[str, str]] = None) -> Optional[BeautifulSoup]:
-    """Enhanced static page scraping with better error handling and user agent."""
+# Selenium is heavy to import and only needed for dynamic pages, so it is
+# imported on first use; static scraping works without it
+SELENIUM_AVAILABLE = importlib.util.find_spec("selenium") is not None
+
+# lxml is a much faster tree builder than the pure-Python html.parser
+try:
+    import lxml.html
+    from lxml import etree
+    HTML_PARSER = "lxml"
+except ImportError:
+    lxml = None
+    HTML_PARSER = "html.parser"
+
+# selectolax (Lexbor, C) parses a results page far faster than a BeautifulSoup tree
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    LexborHTMLParser = None
+    SELECTOLAX_AVAILABLE = False
+
+def _class_test(*classes: str) -> str:
+    """XPath predicate matching elements that carry all the given classes"""
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')" for cls in classes)
+
+# Google's result snippet blocks, compiled once at import
+GOOGLE_SNIPPET_CSS = "div.BNeawe.s3v9rd.AP7Wnd"
+GOOGLE_SNIPPET_SELECTOR = soupsieve.compile(GOOGLE_SNIPPET_CSS)
+if lxml is not None:
+    # Same selector as XPath, for parsing with lxml directly when selectolax is missing
+    GOOGLE_SNIPPET_XPATH = etree.XPath(f"//div[{_class_test('BNeawe', 's3v9rd', 'AP7Wnd')}]")
+
+# Bing's result paragraphs, used alongside Google by search_snippets
+BING_SNIPPET_CSS = "li.b_algo p"
+BING_SNIPPET_SELECTOR = soupsieve.compile(BING_SNIPPET_CSS)
+if lxml is not None:
+    BING_SNIPPET_XPATH = etree.XPath(f"//li[{_class_test('b_algo')}]//p")
+
+# Engine -> (search URL prefix, CSS selector, compiled soupsieve selector, lxml XPath)
+SEARCH_ENGINES = {
+    "google": ("https://www.google.com/search?", GOOGLE_SNIPPET_CSS, GOOGLE_SNIPPET_SELECTOR,
+               GOOGLE_SNIPPET_XPATH if lxml is not None else None),
+    "bing": ("https://www.bing.com/search?", BING_SNIPPET_CSS, BING_SNIPPET_SELECTOR,
+             BING_SNIPPET_XPATH if lxml is not None else None),
+}
+
+# Fetches for search_snippets run here so the engines' round-trips overlap
+_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+
+# Shared session so repeated fetches reuse pooled keep-alive connections
+WEB_SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, pool_block=False)
+WEB_SESSION.mount("https://", _adapter)
+WEB_SESSION.mount("http://", _adapter)
+
+# Browser-like headers, set once on the session instead of rebuilt per request.
+# Accept-Encoding comes from requests so "br" is only offered when a brotli
+# decoder is installed (otherwise the body would arrive undecodable)
+WEB_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+    'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+})
+
+# Snippets of recent searches are reused for SERP_CACHE_TTL seconds
+SERP_CACHE_TTL = 300.0
+SERP_CACHE_SIZE = 128
+_serp_cache = OrderedDict()
+# search_snippets fills the cache from several threads at once
+_serp_cache_lock = threading.Lock()
+
+def fetch_page(url: str, headers: Optional[Dict[str, str]] = None) -> Optional[bytes]:
+    """Download a page with browser-like headers; returns the raw body or None on error."""
     try:
-        # Default headers to mimic a real browser
-        default_headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        if headers:
-            default_headers.update(headers)
-        
-        response = requests.get(url, headers=default_headers, timeout=10)
+        # Session headers are merged with any per-call ones by requests
+        response = WEB_SESSION.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        return soup
+        return response.content
         
     except requests.exceptions.RequestException as e:
         print(f"Erro ao acessar a página estática {url}: {e}")
         return None
 
+def scrape_static_page(url: str, headers: Optional[Dict[str, str]] = None) -> Optional[BeautifulSoup]:
+    """Enhanced static page scraping with better error handling and user agent."""
+    html = fetch_page(url, headers)
+    if html is None:
+        return None
+    # Raw bytes let the parser sniff the charset itself instead of decoding twice
+    return BeautifulSoup(html, HTML_PARSER)
+
+def extract_google_snippets(soup: BeautifulSoup, limit: int = 3) -> List[Any]:
+    """Return up to `limit` result snippet elements from a Google results page."""
+    return GOOGLE_SNIPPET_SELECTOR.select(soup, limit=limit)
+
+def engine_snippets(engine: str, query: str, limit: int = 3) -> Optional[List[str]]:
+    """Text of the top result snippets from one search engine, cached for a few minutes.
+
+    If the page can't be fetched, an expired cached answer is returned instead;
+    None only when there is nothing cached (failures themselves are not cached).
+    """
+    url, css, selector, xpath = SEARCH_ENGINES[engine]
+    key = (engine, " ".join(query.lower().split()), limit)
+    with _serp_cache_lock:
+        cached = _serp_cache.get(key)
+        if cached and time.monotonic() - cached[0] < SERP_CACHE_TTL:
+            _serp_cache.move_to_end(key)
+            return cached[1]
+    
+    html = fetch_page(url + urlencode({"q": query}))
+    if html is None:
+        # Stale results beat no results while the network is flaky
+        return cached[1] if cached else None
+    
+    if SELECTOLAX_AVAILABLE:
+        nodes = LexborHTMLParser(html).css(css)[:limit]
+        snippets = [node.text(strip=True) for node in nodes]
+    elif lxml is not None:
+        nodes = xpath(lxml.html.fromstring(html))[:limit]
+        snippets = [node.text_content().strip() for node in nodes]
+    else:
+        soup = BeautifulSoup(html, HTML_PARSER)
+        snippets = [element.get_text(strip=True) for element in selector.select(soup, limit=limit)]
+    with _serp_cache_lock:
+        _serp_cache[key] = (time.monotonic(), snippets)
+        _serp_cache.move_to_end(key)
+        while len(_serp_cache) > SERP_CACHE_SIZE:
+            _serp_cache.popitem(last=False)
+    return snippets
+
+def google_snippets(query: str, limit: int = 3) -> Optional[List[str]]:
+    """Text of the top Google result snippets for a query (see engine_snippets)."""
+    return engine_snippets("google", query, limit)
+
+def search_snippets(query: str, limit: int = 3) -> Optional[List[str]]:
+    """Top result snippets, querying Google and Bing at the same time.
+
+    Google's snippets are preferred; Bing's answer, fetched in parallel, is
+    used when Google fails or returns nothing, so the fallback costs no
+    extra round-trip. None only when neither engine could be reached.
+    """
+    futures = [_search_executor.submit(engine_snippets, engine, query, limit) for engine in SEARCH_ENGINES]
+    reached = False
+    for future in futures:
+        snippets = future.result()
+        if snippets:
+            return snippets  # Later engines finish in the background and just fill the cache
+        reached = reached or snippets is not None
+    return [] if reached else None
+
+# Engine -> (result container CSS, title CSS fallbacks, snippet CSS fallbacks);
+# shared by the BeautifulSoup and selectolax extractors below
+RESULT_SELECTORS = {
+    "google": ("div.g",
+               ("h3", "a", 'div[class="BNeawe vvjwJb AP7Wnd"]'),
+               ('span[class="aCOpRe"]', 'div[class="BNeawe s3v9rd AP7Wnd"]',
+                'div[class="VwiC3b yXK7lf MUxGbd yDYNvb lyLwlc lEBKkf"]')),
+    "bing": ("li.b_algo", ("h2",), ("p",)),
+}
+
+def _build_results(containers, search_engine: str, first, text, href) -> List[Dict[str, Any]]:
+    """Turn result containers into result dicts; `first`, `text` and `href` adapt the parser's element API."""
+    _, title_css, snippet_css = RESULT_SELECTORS[search_engine]
+    results = []
+    for container in containers:
+        try:
+            title_element = next(filter(None, (first(container, css) for css in title_css)), None)
+            snippet_element = next(filter(None, (first(container, css) for css in snippet_css)), None)
+            link_element = first(container, "a[href]")
+            title = text(title_element).strip() if title_element else "Sem título"
+            snippet = text(snippet_element).strip() if snippet_element else "Sem descrição"
+            if title and snippet:
+                results.append({
+                    'title': title,
+                    'snippet': snippet,
+                    'url': (href(link_element) or "") if link_element else "",
+                    'source': search_engine
+                })
+        except Exception:
+            continue
+    return results
+
 def extract_search_results(soup: BeautifulSoup, search_engine: str = "google") -> List[Dict[str, Any]]:
     """Extract search results from different search engines."""
-    results = []
-    
+    engine = search_engine.lower()
+    if engine not in RESULT_SELECTORS:
+        return []
     try:
-        if search_engine.lower() == "google":
-            # Updated selectors for Google search results
-            result_selectors = [
-                'div.g',  # Main result container
-                'div[data-sokoban-container]',  # Alternative container
-            ]
-            
-            for selector in result_selectors:
-                result_containers = soup.find_all('div', class_=lambda x: x and 'g' in x.split() if x else False)
-                if result_containers:
-                    break
-            
-            for container in result_containers[:5]:  # Get top 5 results
-                try:
-                    # Try different title selectors
-                    title_element = (container.find('h3') or 
-                                   container.find('a') or 
-                                   container.find('div', class_='BNeawe vvjwJb AP7Wnd'))
-                    
-                    title = title_element.get_text().strip() if title_element else "Sem título"
-                    
-                    # Try different snippet selectors
-                    snippet_element = (container.find('span', class_='aCOpRe') or
-                                     container.find('div', class_='BNeawe s3v9rd AP7Wnd') or
-                                     container.find('div', class_='VwiC3b yXK7lf MUxGbd yDYNvb lyLwlc lEBKkf'))
-                    
-                    snippet = snippet_element.get_text().strip() if snippet_element else "Sem descrição"
-                    
-                    # Try to get URL
-                    link_element = container.find('a', href=True)
-                    url = link_element['href'] if link_element else ""
-                    
-                    if title and snippet:
-                        results.append({
-                            'title': title,
-                            'snippet': snippet,
-                            'url': url,
-                            'source': 'google'
-                        })
-                        
-                except Exception as e:
-                    continue
-                    
-        elif search_engine.lower() == "bing":
-            # Bing search result selectors
-            result_containers = soup.find_all('li', class_='b_algo')
-            
-            for container in result_containers[:5]:
-                try:
-                    title_element = container.find('h2')
-                    title = title_element.get_text().strip() if title_element else "Sem título"
-                    
-                    snippet_element = container.find('p')
-                    snippet = snippet_element.get_text().strip() if snippet_element else "Sem descrição"
-                    
-                    link_element = container.find('a', href=True)
-                    url = link_element['href'] if link_element else ""
-                    
-                    results.append({
-                        'title': title,
-                        'snippet': snippet,
-                        'url': url,
-                        'source': 'bing'
-                    })
-                except Exception:
-                    continue
-    
+        containers = soup.select(RESULT_SELECTORS[engine][0], limit=5)  # Top 5 results
+        return _build_results(containers, engine, lambda el, css: el.select_one(css),
+                              lambda el: el.get_text(), lambda el: el.get('href'))
     except Exception as e:
         print(f"Erro ao extrair resultados de busca: {e}")
-    
-    return results
+        return []
+
+def _extract_search_results_lexbor(tree: "LexborHTMLParser", search_engine: str = "google") -> List[Dict[str, Any]]:
+    """extract_search_results() over a selectolax tree: same selectors, parsed and matched in C."""
+    engine = search_engine.lower()
+    if engine not in RESULT_SELECTORS:
+        return []
+    containers = tree.css(RESULT_SELECTORS[engine][0])[:5]
+    return _build_results(containers, engine, lambda el, css: el.css_first(css),
+                          lambda el: el.text(), lambda el: el.attributes.get("href"))
 
 def search_web(query: str, search_engine: str = "google", num_results: int = 5) -> Dict[str, Any]:
     """Perform web search with enhanced result extraction."""
     try:
         # Construct search URL
         if search_engine.lower() == "google":
-            search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}&num={num_results}"
+            search_url = "https://www.google.com/search?" + urlencode({"q": query, "num": num_results})
         elif search_engine.lower() == "bing":
-            search_url = f"https://www.bing.com/search?q={query.replace(' ', '+')}&count={num_results}"
+            search_url = "https://www.bing.com/search?" + urlencode({"q": query, "count": num_results})
         else:
-            search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}&num={num_results}"
+            search_url = "https://www.google.com/search?" + urlencode({"q": query, "num": num_results})
             search_engine = "google"
         
         print(f"🔍 Searching: {search_url}")
         
         # Get page content
-        soup = scrape_static_page(search_url)
-        if not soup:
+        html = fetch_page(search_url)
+        if html is None:
             return {"query": query, "results": [], "error": "Failed to retrieve search page"}
         
-        # Extract results
-        results = extract_search_results(soup, search_engine)
+        # Extract results (selectolax when installed; BeautifulSoup otherwise)
+        if SELECTOLAX_AVAILABLE:
+            results = _extract_search_results_lexbor(LexborHTMLParser(html), search_engine)
+        else:
+            results = extract_search_results(BeautifulSoup(html, HTML_PARSER), search_engine)
         
         # Add metadata
         search_data = {
@@ -186,6 +295,16 @@ def get_page_summary(url: str, max_paragraphs: int = 3) -> Dict[str, Any]:
 
 def scrape_dynamic_page(url, element_id=None, class_name=None, tag_name=None):
     """Realiza webscraping em páginas dinâmicas usando Selenium."""
+    if not SELENIUM_AVAILABLE:
+        print("Selenium não instalado; páginas dinâmicas indisponíveis (pip install selenium).")
+        return None
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
     options = Options()
     options.add_argument('--headless')  # Executar em modo headless (sem interface gráfica)
     options.add_argument('--no-sandbox')
@@ -209,7 +328,7 @@ def scrape_dynamic_page(url, element_id=None, class_name=None, tag_name=None):
                 EC.presence_of_element_located((By.TAG_NAME, tag_name))
             )
         
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        soup = BeautifulSoup(driver.page_source, HTML_PARSER)
         return soup
     except Exception as e:
         print(f"Erro ao acessar a página dinâmica {url}: {e}")